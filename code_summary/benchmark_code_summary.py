@@ -0,0 +1,390 @@
+'''
+This Python script benchmarks code_summary.py against synthetic directory trees so that changes to the scanner can be checked for speed and memory regressions. The main functions of the script include:
+1. Synthetic Tree Generation (generate_tree function):
+ 1.1. Builds a directory tree with a configurable depth, fan-out and total file count.
+ 1.2. Fills it with a configurable size mix of files, for example lots of small .py files, a few large .json files and .html files with <script> and <style> blocks.
+2. Running the Benchmarks (run_benchmark function):
+ 2.1. Runs each benchmark in a fresh child process, so the peak memory of one does not hide the peak memory of the next.
+ 2.2. Covers analyze_directory (on the process pool and in a single process), the code/comment/blank breakdown, count_embedded_code, write_summary_to_file and stream_summary_to_file.
+ 2.3. Reports files/s, MB/s and peak RSS for each benchmark (the best of a number of repeats).
+3. Saving and Comparing Results (save_results and compare_results functions):
+ 3.1. Appends every run to a JSON lines results file, along with the tree settings and the git revision when there is one.
+ 3.2. Compares the run with the last saved run of the same tree settings and flags any benchmark that got slower or used more memory than the threshold allows.
+
+How to Use This Script:
+1. Keep the Script Next to code_summary.py: It imports the scanner from the same folder.
+2. Run the Script: For example "python benchmark_code_summary.py --files 20000 --depth 3 --fanout 4". The tree is generated in a temporary folder (or in --tree, where it is kept and reused; --tree has to be a new or empty folder, or one generated by an earlier run) and each benchmark is run --repeat times.
+3. Choose the Size Mix: --mix takes ext=weight:size pairs, such as "py=80:2k,json=5:512k,html=15:8k", where weight is the share of the files and size the average file size.
+4. Review Results: The results are printed and appended to benchmark_results.jsonl (or --results). Any regression against the previous run is listed at the end.
+
+Note:
+1. Peak RSS is read with the resource module, which is not available on Windows; it is left empty there.
+2. Results are only comparable between runs on the same machine with the same tree settings.
+'''
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import code_summary
+
+# Benchmarks run by default, in order
+BENCHMARKS = ['analyze', 'analyze_serial', 'analyze_sloc', 'embedded', 'write_summary', 'stream']
+# Default size mix: extension -> (share of the files, average size in bytes)
+DEFAULT_MIX = 'py=80:2k,json=5:512k,html=15:8k'
+
+def parse_mix(mix):
+    """
+    Parses a size mix such as "py=80:2k,json=5:512k".
+
+    Args:
+    mix (str): Comma-separated ext=weight:size pairs. Sizes may end in k or m.
+
+    Returns:
+    list: (file_ext, weight, size) tuples.
+    """
+    parsed = []
+    for item in mix.split(','):
+        ext, spec = item.strip().split('=')
+        weight, size = spec.split(':')
+        multiplier = {'k': 1024, 'm': 1024 * 1024}.get(size[-1].lower(), 1)
+        size = int(float(size.rstrip('kKmM')) * multiplier)
+        parsed.append(('.' + ext.lstrip('.'), float(weight), size))
+    return parsed
+
+def _py_content(rng, size):
+    """Generates Python source of about the given size."""
+    parts = ['"""\nGenerated module for benchmarking.\n"""\n\nimport os\n\n']
+    length = len(parts[0])
+    while length < size:
+        n = rng.randint(0, 10**6)
+        part = (f"# Helper number {n}\n"
+                f"def helper_{n}(value, scale={rng.randint(1, 9)}):\n"
+                f"    \"\"\"Scales the value.\"\"\"\n"
+                f"    result = value * scale  # scaled\n"
+                f"    return os.path.join('dir', str(result))\n\n")
+        parts.append(part)
+        length += len(part)
+    return ''.join(parts)
+
+def _json_content(rng, size):
+    """Generates a JSON array of records of about the given size."""
+    parts = ['[\n']
+    length = 2
+    while length < size:
+        n = rng.randint(0, 10**6)
+        part = f'  {{"id": {n}, "name": "item-{n}", "tags": ["a", "b"], "score": {rng.random():.6f}}},\n'
+        parts.append(part)
+        length += len(part)
+    parts.append('  {}\n]\n')
+    return ''.join(parts)
+
+def _html_content(rng, size):
+    """Generates an HTML page with script and style blocks of about the given size."""
+    parts = ['<!DOCTYPE html>\n<html>\n<head>\n<style>\nbody { margin: 0; }\n</style>\n</head>\n<body>\n']
+    length = len(parts[0])
+    while length < size:
+        n = rng.randint(0, 10**6)
+        if rng.random() < 0.3:
+            part = (f"<script>\n  var item{n} = document.getElementById('item-{n}');\n"
+                    f"  item{n}.addEventListener('click', function () {{ console.log({n}); }});\n</script>\n")
+        elif rng.random() < 0.1:
+            part = f'<style>.item-{n} {{ color: #{n % 0xFFFFFF:06x}; }}</style>\n'
+        else:
+            part = f'<div class="item-{n}">\n  <p>Item {n}</p>\n  <!-- comment {n} -->\n</div>\n'
+        parts.append(part)
+        length += len(part)
+    parts.append('</body>\n</html>\n')
+    return ''.join(parts)
+
+_GENERATORS = {'.py': _py_content, '.json': _json_content, '.html': _html_content}
+
+def generate_tree(root, files, depth, fanout, mix, seed=0):
+    """
+    Generates a synthetic directory tree to benchmark against.
+
+    Args:
+    root (str): The folder to create the tree in.
+    files (int): The total number of files.
+    depth (int): How many levels of subfolders to create below the root.
+    fanout (int): The number of subfolders in each folder.
+    mix (list): (file_ext, weight, size) tuples from parse_mix. Extensions without a
+                generator get filler text.
+    seed (int): Seed for the random generator, so the same settings give the same tree.
+
+    Returns:
+    int: The total size of the generated files in bytes.
+    """
+    rng = random.Random(seed)
+    folders = [root]
+    level = [root]
+    for _ in range(depth):
+        level = [os.path.join(folder, f'dir{i}') for folder in level for i in range(fanout)]
+        folders.extend(level)
+    for folder in folders:
+        os.makedirs(folder, exist_ok=True)
+
+    exts = [ext for ext, _, _ in mix]
+    weights = [weight for _, weight, _ in mix]
+    sizes = {ext: size for ext, _, size in mix}
+    total_bytes = 0
+    for i in range(files):
+        ext = rng.choices(exts, weights)[0]
+        # Vary sizes between half and one and a half times the average
+        size = int(sizes[ext] * rng.uniform(0.5, 1.5))
+        generator = _GENERATORS.get(ext)
+        content = generator(rng, size) if generator else 'filler text\n' * (size // 12)
+        data = content.encode('utf-8')
+        with open(os.path.join(folders[i % len(folders)], f'file{i}{ext}'), 'wb') as f:
+            f.write(data)
+        total_bytes += len(data)
+    return total_bytes
+
+def _tree_stats(root):
+    """
+    Counts the tracked files under root and their total size.
+
+    Returns:
+    tuple: The number of tracked files, their total size in bytes, and the paths of
+           the HTML files.
+    """
+    files = 0
+    total_bytes = 0
+    html_files = []
+    for folder, _, filenames in os.walk(root):
+        for filename in filenames:
+            ext = os.path.splitext(filename)[1]
+            if ext in code_summary.TRACKED_FILE_TYPES:
+                path = os.path.join(folder, filename)
+                files += 1
+                total_bytes += os.path.getsize(path)
+                if ext in code_summary.HTML_FILE_TYPES:
+                    html_files.append(path)
+    return files, total_bytes, html_files
+
+def _peak_rss():
+    """Returns the peak RSS of this process and its children in bytes, or None."""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    unit = 1 if sys.platform == 'darwin' else 1024
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(self_rss, children_rss) * unit
+
+def _run_in_process(name, root, workers, repeat):
+    """
+    Runs one benchmark in this process.
+
+    Returns:
+    dict: The benchmark name, best time, files/s, MB/s and peak RSS.
+    """
+    files, total_bytes, html_files = _tree_stats(root)
+    output_file = os.devnull
+    if name == 'write_summary':
+        analysis = code_summary.analyze_directory(root, workers)
+    if name == 'embedded':
+        html_data = []
+        for path in html_files:
+            with open(path, 'rb') as f:
+                html_data.append((os.path.splitext(path)[1].lower(), f.read()))
+        files = len(html_data)
+        total_bytes = sum(len(data) for _, data in html_data)
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if name == 'analyze':
+            code_summary.analyze_directory(root, workers)
+        elif name == 'analyze_serial':
+            code_summary.analyze_directory(root, 1)
+        elif name == 'analyze_sloc':
+            code_summary.analyze_directory(root, workers, sloc=True)
+        elif name == 'embedded':
+            for file_ext, data in html_data:
+                code_summary.count_embedded_code(data, file_ext)
+        elif name == 'write_summary':
+            code_summary.write_summary_to_file(*analysis, output_file)
+        elif name == 'stream':
+            code_summary.stream_summary_to_file(root, output_file, workers)
+        else:
+            raise ValueError(f"Unknown benchmark: {name}")
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return {
+        'benchmark': name,
+        'seconds': round(best, 4),
+        'files_per_s': round(files / best, 1) if best else None,
+        'mb_per_s': round(total_bytes / best / (1024 * 1024), 2) if best else None,
+        'peak_rss_mb': round(_peak_rss() / (1024 * 1024), 1) if resource is not None else None,
+    }
+
+def run_benchmark(name, root, workers, repeat):
+    """
+    Runs one benchmark in a fresh child process and returns its results.
+
+    Args:
+    name (str): The benchmark to run (one of BENCHMARKS).
+    root (str): The tree to run it against.
+    workers (int): The number of worker processes for code_summary (None for all CPUs).
+    repeat (int): How many times to run it; the best time is kept.
+
+    Returns:
+    dict: The benchmark name, best time, files/s, MB/s and peak RSS.
+    """
+    command = [sys.executable, os.path.abspath(__file__), '--run-one', name, '--tree', root, '--repeat', str(repeat)]
+    if workers is not None:
+        command += ['--workers', str(workers)]
+    completed = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def _git_revision():
+    """Returns the current git revision of this folder, or None."""
+    try:
+        completed = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        return completed.stdout.strip() or None
+    except Exception:
+        return None
+
+def load_results(results_file):
+    """
+    Loads the saved runs from a JSON lines results file.
+
+    Returns:
+    list: The saved runs, oldest first.
+    """
+    runs = []
+    try:
+        with open(results_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    runs.append(json.loads(line))
+    except FileNotFoundError:
+        pass
+    return runs
+
+def save_results(results_file, run):
+    """Appends a run to the JSON lines results file."""
+    with open(results_file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(run) + '\n')
+
+def compare_results(previous, current, threshold):
+    """
+    Compares a run with an earlier run of the same tree settings.
+
+    Args:
+    previous (dict): The earlier run.
+    current (dict): The new run.
+    threshold (float): The allowed relative slowdown or memory growth, e.g. 0.1 for 10%.
+
+    Returns:
+    list: A message for each benchmark that regressed.
+    """
+    regressions = []
+    earlier = {result['benchmark']: result for result in previous['results']}
+    for result in current['results']:
+        old = earlier.get(result['benchmark'])
+        if old is None:
+            continue
+        if old['seconds'] and result['seconds'] > old['seconds'] * (1 + threshold):
+            regressions.append(f"{result['benchmark']}: {old['seconds']}s -> {result['seconds']}s")
+        if old.get('peak_rss_mb') and result.get('peak_rss_mb') and result['peak_rss_mb'] > old['peak_rss_mb'] * (1 + threshold):
+            regressions.append(f"{result['benchmark']}: peak RSS {old['peak_rss_mb']} MB -> {result['peak_rss_mb']} MB")
+    return regressions
+
+def main():
+    """
+    Generates (or reuses) a synthetic tree, runs the benchmarks and saves the results.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark code_summary.py on a synthetic tree.")
+    parser.add_argument('--files', type=int, default=20000, help="total number of files (default: 20000)")
+    parser.add_argument('--depth', type=int, default=3, help="levels of subfolders (default: 3)")
+    parser.add_argument('--fanout', type=int, default=4, help="subfolders per folder (default: 4)")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"size mix as ext=weight:size pairs (default: {DEFAULT_MIX})")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for the tree (default: 0)")
+    parser.add_argument('--tree', help="folder to generate the tree in and keep (default: a temporary folder)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes for code_summary (default: number of CPUs)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per benchmark, keeping the best (default: 3)")
+    parser.add_argument('--benchmarks', default=','.join(BENCHMARKS), help="comma-separated benchmarks to run")
+    parser.add_argument('--results', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_results.jsonl'),
+                        help="JSON lines file to append the results to")
+    parser.add_argument('--threshold', type=float, default=0.1, help="relative slowdown reported as a regression (default: 0.1)")
+    parser.add_argument('--run-one', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        # Child process started by run_benchmark
+        print(json.dumps(_run_in_process(args.run_one, args.tree, args.workers, args.repeat)))
+        return
+
+    settings = {'files': args.files, 'depth': args.depth, 'fanout': args.fanout, 'mix': args.mix, 'seed': args.seed}
+    if args.tree and os.path.isdir(args.tree) and os.listdir(args.tree) \
+            and not os.path.exists(os.path.join(args.tree, 'bench_settings.json')):
+        # Only a tree this script generated is ever regenerated, so nothing else gets deleted
+        parser.error(f"--tree {args.tree} is not empty and was not generated by this script; give an empty or new folder")
+    root = args.tree or tempfile.mkdtemp(prefix='code_summary_bench_')
+    try:
+        if args.tree and os.path.exists(os.path.join(root, 'bench_settings.json')):
+            with open(os.path.join(root, 'bench_settings.json'), 'r', encoding='utf-8') as f:
+                reuse = json.load(f) == settings
+        else:
+            reuse = False
+        if not reuse:
+            print(f"Generating {args.files} files in {root}...")
+            if args.tree and os.path.exists(os.path.join(root, 'bench_settings.json')):
+                # A tree generated with other settings
+                shutil.rmtree(root)
+            os.makedirs(root, exist_ok=True)
+            total_bytes = generate_tree(root, args.files, args.depth, args.fanout, parse_mix(args.mix), args.seed)
+            with open(os.path.join(root, 'bench_settings.json'), 'w', encoding='utf-8') as f:
+                json.dump(settings, f)
+            print(f"Generated {total_bytes / (1024 * 1024):.1f} MB")
+
+        results = []
+        for name in args.benchmarks.split(','):
+            result = run_benchmark(name.strip(), root, args.workers, args.repeat)
+            results.append(result)
+            print(f"{result['benchmark']:<15} {result['seconds']:>9.3f}s {result['files_per_s']:>12.1f} files/s "
+                  f"{result['mb_per_s']:>9.2f} MB/s  peak RSS {result['peak_rss_mb']} MB")
+    finally:
+        if not args.tree:
+            shutil.rmtree(root, ignore_errors=True)
+
+    run = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'revision': _git_revision(),
+        'python': sys.version.split()[0],
+        'workers': args.workers,
+        'settings': settings,
+        'results': results,
+    }
+    previous = [saved for saved in load_results(args.results) if saved.get('settings') == settings and saved.get('workers') == args.workers]
+    save_results(args.results, run)
+    print(f"Results appended to {args.results}")
+
+    if previous:
+        regressions = compare_results(previous[-1], run, args.threshold)
+        if regressions:
+            print(f"\nRegressions against the run of {previous[-1]['created']} ({previous[-1].get('revision')}):")
+            for regression in regressions:
+                print(f"  {regression}")
+        else:
+            print(f"\nNo regressions against the run of {previous[-1]['created']} ({previous[-1].get('revision')}).")
+
+if __name__ == "__main__":
+    main()
@@ -1,153 +1,1170 @@
-'''
-This Python script performs a comprehensive analysis of a specified directory (typically a project folder) and generates a summary report in a text file (codesummary.txt). The main functions of the script include:
-1. Directory Analysis (analyze_directory function):
- 1.1. Analyzes the given directory, counts characters and lines in various code files (e.g., .py, .html, .js, etc.), and generates a directory tree.
- 1.2. Excludes certain folders (those starting with "." and the "public" folder) and counts embedded JavaScript in HTML and .j2 files.
- 1.3. Returns a tuple containing a dictionary with file type stats (count, characters, lines) and a list representing the directory tree.
-2. Extracting Embedded JavaScript (extract_js_from_html function):
- 2.1. Extracts JavaScript code embedded within HTML content, which is then used in the overall analysis.
-3. Writing Summary to File (write_summary_to_file function):
- 3.1. Writes a detailed summary of the analysis to an output file, including the directory tree and statistics for each tracked file type (percentage of total characters and lines).
-4. Execution Flow:
- 4.1. The script sets the parent_directory to the current working directory (where the script is run).
- 4.2. It then calls analyze_directory to analyze this directory and write_summary_to_file to write the analysis summary to codesummary.txt.
-Finally, it prints a message indicating the completion of the analysis.
-
-How to Use This Script:
-1. Place the Script in a Parent Directory: This script is designed to be dropped into any parent folder you want to analyze.
-2. Run the Script: Execute it. The script will analyze the directory structure, file information, and generate a summary of the files.
-3. Review Output: Check the generated codesummary.txt for a detailed report of the directory and file analysis.
-
-Note:
-1. The script specifically tracks certain file types (e.g., .py, .html) for detailed analysis, but it can be modified to include or exclude different file types as needed.
-2. It's particularly useful for getting an overview of a project's structure and the composition of its codebase.
-'''
-
-import os
-
-def analyze_directory(parent_dir):
-    """
-    Analyzes the specified directory, counting the characters and lines in code files and
-    generating a directory tree, while excluding certain folders and counting embedded JS.
-
-    Args:
-    parent_dir (str): The parent directory to analyze.
-
-    Returns:
-    tuple: A tuple containing a dictionary of file types with their counts, character sums, and LOC,
-           and a list representing the directory tree.
-    """
-    file_types = {}
-    total_chars = 0
-    total_lines = 0
-    directory_tree = []
-
-    for root, dirs, files in os.walk(parent_dir, topdown=True):
-        # Skip directories that start with "." and the "public" folder
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d != 'public']
-
-        level = root.replace(parent_dir, '').count(os.sep)
-        indent = '│   ' * level
-        tree_prefix = '├── ' if level > 0 else ''
-        directory_tree.append(f"{indent}{tree_prefix}{os.path.basename(root)}/")
-
-        for file in files:
-            if file == 'code_summary.py':  # Skip the script file itself
-                continue
-
-            file_path = os.path.join(root, file)
-            _, file_ext = os.path.splitext(file)
-
-            # Initialize file type in dictionary if not present
-            if file_ext not in file_types:
-                file_types[file_ext] = {'count': 0, 'chars': 0, 'lines': 0}
-
-            # Process specific file types
-            if file_ext in ['.py', '.html', '.css', '.js', '.json', '.md', '.yml', '.xml', '.j2', '.scss', '.ts', '.sql']:
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        file_content = f.readlines()
-                except Exception as e:
-                    print(f"Error reading file {file_path}: {e}")
-                    continue
-
-                char_count = sum(len(line) for line in file_content)
-                loc_count = len(file_content)
-
-                # Count embedded JavaScript in HTML and .j2 files
-                if file_ext in ['.html', '.j2']:
-                    js_content = extract_js_from_html('\n'.join(file_content))
-                    # Ensure .js key is initialized
-                    if '.js' not in file_types:
-                        file_types['.js'] = {'count': 0, 'chars': 0, 'lines': 0}
-                    file_types['.js']['chars'] += len(js_content)
-                    file_types['.js']['lines'] += js_content.count('\n') + 1
-
-                total_chars += char_count
-                total_lines += loc_count
-
-                directory_tree.append(f"{indent}│   {file} - {char_count} chars, {loc_count} lines")
-
-                file_types[file_ext]['count'] += 1
-                file_types[file_ext]['chars'] += char_count
-                file_types[file_ext]['lines'] += loc_count
-            else:
-                directory_tree.append(f"{indent}│   {file}")
-
-    return file_types, total_chars, total_lines, directory_tree
-
-def extract_js_from_html(html_content):
-    """
-    Extracts JavaScript code embedded within HTML content.
-
-    Args:
-    html_content (str): The HTML content to parse.
-
-    Returns:
-    str: Extracted JavaScript code.
-    """
-    js_code = []
-    in_script = False
-    for line in html_content.split('\n'):
-        if '<script' in line:
-            in_script = True
-        elif '</script>' in line:
-            in_script = False
-        elif in_script:
-            js_code.append(line)
-    return '\n'.join(js_code)
-
-def write_summary_to_file(file_types, total_chars, total_lines, directory_tree, output_file):
-    """
-    Writes the summary of the analysis and the directory tree to a text file.
-
-    Args:
-    file_types (dict): A dictionary of file types with their counts, character sums, and LOC.
-    total_chars (int): Total number of characters in the codebase.
-    total_lines (int): Total number of lines in the codebase.
-    directory_tree (list): The directory tree list.
-    output_file (str): Path to the output file where the summary will be written.
-    """
-    tracked_file_types = ['.py', '.html', '.css', '.js', '.json', '.md', '.yml', '.xml', '.j2', '.scss', '.ts', '.sql']
-    
-    try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("Directory Tree:\n")
-            f.write("\n".join(directory_tree))
-            f.write("\n\nSummary:\n")
-            for ext, data in file_types.items():
-                if ext in tracked_file_types:
-                    char_percentage = (data['chars'] / total_chars) * 100 if total_chars > 0 else 0
-                    line_percentage = (data['lines'] / total_lines) * 100 if total_lines > 0 else 0
-                    f.write(f"Type: {ext}, Files: {data['count']}, Total characters: {data['chars']} ({char_percentage:.2f}%), Total lines: {data['lines']} ({line_percentage:.2f}%)\n")
-    except Exception as e:
-        print(f"Error writing to file {output_file}: {e}")
-
-parent_directory = os.getcwd()  # Current working directory
-output_file = 'codesummary.txt'
-
-print("Analyzing directory...")
-file_types, total_chars, total_lines, directory_tree = analyze_directory(parent_directory)
-print("Writing summary to 'codesummary.txt'...")
-write_summary_to_file(file_types, total_chars, total_lines, directory_tree, output_file)
-print("Analysis complete.")
\ No newline at end of file
+'''
+This Python script performs a comprehensive analysis of a specified directory (typically a project folder) and generates a summary report in a text file (codesummary.txt). The main functions of the script include:
+1. Directory Analysis (analyze_directory function):
+ 1.1. Analyzes the given directory, counts characters and lines in various code files (e.g., .py, .html, .js, etc.), and generates a directory tree.
+ 1.2. Excludes certain folders (those starting with "." and the "public" folder) and counts embedded JavaScript and CSS in HTML and .j2 files.
+ 1.3. Returns a tuple containing a dictionary with file type stats (count, characters, lines) and a list representing the directory tree.
+ 1.4. The walk itself is done by scan_directory, which hands the tracked files to a pool of worker processes in batches (set workers=1 to count in a single process).
+ 1.5. iter_directory_tree yields the tree lines as the walk proceeds; analyze_directory collects them into a list.
+ 1.6. Keeps a file-stats cache (.codesummary_cache.json) keyed on path, size, mtime and inode, so a rerun only opens the files that changed since the last run.
+2. Counting Engine (count_file function):
+ 2.1. Reads each file in binary chunks and counts newlines and decoded characters without building a string per line.
+ 2.2. The counts are the same as reading the file as UTF-8 text with universal newlines.
+3. Counting Embedded JavaScript and CSS (count_embedded_code function):
+ 3.1. Scans the raw bytes of HTML and .j2 files once for <script> and <style> blocks (inline or multi-line, skipping tags commented out with <!-- --> or, in .j2 files, {# #}) and adds their characters and lines to the .js and .css totals.
+4. Code/Comment/Blank Breakdown (count_sloc function):
+ 4.1. Runs the raw bytes of a file through a per-language state machine (comment and string syntax in _SLOC_SYNTAX) and classifies every line as code, comment or blank. Only comments and strings are visited one at a time; the lines between them are counted in bulk.
+5. Writing Summary to File (write_summary_to_file function):
+ 5.1. Writes a detailed summary of the analysis to an output file, including the directory tree and statistics for each tracked file type (percentage of total characters and lines).
+ 5.2. With sloc enabled, each file's tree line and each file type's statistics also give the number of code, comment and blank lines.
+ 5.3. stream_summary_to_file writes each tree line to the output file (or stdout) as soon as it is known and appends the per-type summary at the end, so the tree itself is never held in memory. The file-stats cache (and a --snapshot) still keeps one entry per file, so run with --no-cache (and without --snapshot) to keep memory flat however large the tree is.
+6. Snapshots and Diffs (write_snapshot and diff_snapshots functions):
+ 6.1. write_snapshot saves the per-file and per-type stats as JSON (or the per-file rows as CSV), sorted by path.
+ 6.2. diff_snapshots merge-joins two snapshots in a single pass and reports the growth by directory and by file type, so old revisions never need to be scanned again.
+7. Execution Flow:
+ 7.1. The script sets the parent_directory to the current working directory (where the script is run).
+ 7.2. It then calls analyze_directory to analyze this directory and write_summary_to_file to write the analysis summary to codesummary.txt.
+Finally, it prints a message indicating the completion of the analysis.
+
+How to Use This Script:
+1. Place the Script in a Parent Directory: This script is designed to be dropped into any parent folder you want to analyze.
+2. Run the Script: Execute it. The script will analyze the directory structure, file information, and generate a summary of the files.
+3. Review Output: Check the generated codesummary.txt for a detailed report of the directory and file analysis.
+4. Options: Pass a directory to analyze another folder, --output to choose the summary file, --workers to set the number of worker processes, --rescan to ignore the cache and count every file again, --no-cache to run without it, --sloc to add the code/comment/blank breakdown, --stream to write the tree while the walk is running (--output - streams it to stdout), or --snapshot FILE to save the stats as JSON/CSV.
+5. Compare Snapshots: Run with --diff OLD NEW (and optionally --depth N) to report the growth between two snapshots.
+
+Note:
+1. The script specifically tracks certain file types (e.g., .py, .html) for detailed analysis, but it can be modified to include or exclude different file types as needed.
+2. It's particularly useful for getting an overview of a project's structure and the composition of its codebase.
+'''
+
+import argparse
+import codecs
+import csv
+import json
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+# File types whose characters and lines are counted
+TRACKED_FILE_TYPES = ['.py', '.html', '.css', '.js', '.json', '.md', '.yml', '.xml', '.j2', '.scss', '.ts', '.sql']
+# File types scanned for embedded JavaScript and CSS
+HTML_FILE_TYPES = ['.html', '.j2']
+
+# Size of the binary chunks read by the counting engine
+CHUNK_SIZE = 1024 * 1024
+# Number of files handed to a worker process at once
+BATCH_SIZE = 64
+# Walk entries held back waiting for counts before a partial batch is counted
+MAX_PENDING = 4096
+# Name of the file-stats cache kept in the analyzed directory
+CACHE_FILE_NAME = '.codesummary_cache.json'
+# Bumped whenever the cached counts change meaning
+CACHE_VERSION = 2
+# Bumped whenever the snapshot layout changes
+SNAPSHOT_VERSION = 1
+# Per-file columns of a snapshot
+SNAPSHOT_COLUMNS = ['path', 'ext', 'chars', 'lines', 'code', 'comment', 'blank']
+# Placeholder for counts that are still being computed
+_PENDING = object()
+
+# Opening script/style tags, and the HTML comments (and in .j2 files Jinja comments)
+# they may be hidden in
+_EMBED_START = re.compile(rb'<!--|<(script|style)\b[^>]*>', re.IGNORECASE)
+_EMBED_START_J2 = re.compile(rb'<!--|\{#|<(script|style)\b[^>]*>', re.IGNORECASE)
+_EMBED_COMMENT_END = {b'<!--': b'-->', b'{#': b'#}'}
+_EMBED_END = {
+    b'script': re.compile(rb'</script\s*>', re.IGNORECASE),
+    b'style': re.compile(rb'</style\s*>', re.IGNORECASE),
+}
+_EMBED_TYPES = {b'script': '.js', b'style': '.css'}
+
+def _repeat(normal, special):
+    """
+    Builds the pattern for any mix of normal characters and special pieces.
+
+    The pattern is normal*(?:special normal*)*, so as long as no special piece can
+    start with a normal character there is only one way to match any text and a
+    failed match never backtracks through the run.
+
+    Args:
+    normal (bytes): A character class, such as rb'[^"\\]'.
+    special (list): Patterns of the pieces that may come between normal characters.
+
+    Returns:
+    bytes: The pattern.
+    """
+    if not special:
+        return normal + b'*'
+    return normal + rb'*(?:(?:' + b'|'.join(special) + rb')' + normal + rb'*)*'
+
+def _quoted(quote, escapes=True, multiline=False):
+    """
+    Builds the pattern matching the rest of a string literal after its opening quote.
+
+    Args:
+    quote (bytes): The quote that opens and closes the string.
+    escapes (bool): If true, a backslash escapes the next character.
+    multiline (bool): If true, a single-quote string may run over several lines.
+                      Strings opened with a multi-character quote always may.
+
+    Returns:
+    bytes: The pattern, which also stops at the end of the data.
+    """
+    q = re.escape(quote)
+    if not escapes:
+        return rb'[^' + q + rb']*(?:' + q + rb'|\Z)'
+    if len(quote) > 1:
+        first = re.escape(quote[:1])
+        body = _repeat(rb'[^' + first + rb'\\]', [rb'\\(?:[\s\S]|\Z)', first + rb'(?!' + re.escape(quote[1:]) + rb')'])
+        return body + rb'(?:' + q + rb'|\Z)'
+    if multiline:
+        return _repeat(rb'[^' + q + rb'\\]', [rb'\\(?:[\s\S]|\Z)']) + rb'(?:' + q + rb'|\Z)'
+    body = _repeat(rb'[^' + q + rb'\\\r\n]', [rb'\\(?:\r\n|[\s\S]|\Z)'])
+    return body + rb'(?:' + q + rb'|(?=[\r\n])|\Z)'
+
+# Comment and string syntax of each tracked file type for the code/comment/blank
+# breakdown: (line comment markers, (block comment start, end) pairs, (string
+# quote, backslash escapes, may span lines) triples)
+_SLOC_SYNTAX = {
+    '.py': ([b'#'], [], [(b'"""', True, True), (b"'''", True, True), (b'"', True, False), (b"'", True, False)]),
+    '.js': ([b'//'], [(b'/*', b'*/')], [(b'"', True, False), (b"'", True, False), (b'`', True, True)]),
+    '.ts': ([b'//'], [(b'/*', b'*/')], [(b'"', True, False), (b"'", True, False), (b'`', True, True)]),
+    '.css': ([], [(b'/*', b'*/')], [(b'"', True, False), (b"'", True, False)]),
+    '.scss': ([b'//'], [(b'/*', b'*/')], [(b'"', True, False), (b"'", True, False)]),
+    '.sql': ([b'--'], [(b'/*', b'*/')], [(b"'", False, True), (b'"', False, True)]),
+    '.html': ([], [(b'<!--', b'-->')], []),
+    '.xml': ([], [(b'<!--', b'-->')], []),
+    '.md': ([], [(b'<!--', b'-->')], []),
+    '.j2': ([], [(b'<!--', b'-->'), (b'{#', b'#}')], []),
+    '.yml': ([b'#'], [], []),
+    '.json': ([], [], []),
+}
+
+def _compile_sloc_syntax(line_comments, block_comments, strings):
+    """
+    Builds the tokenizer for one file type's _SLOC_SYNTAX entry.
+
+    Returns:
+    tuple: The token pattern, the end marker of each block comment, the
+           rest-of-string pattern of each quote, and for count_sloc's fast path the
+           pattern skipping everything up to the next comment or string opener and
+           matching that opener, and the pattern matching a run of lines holding only
+           line comments (each None if the file type has no use for it).
+    """
+    openers = [start for start, _ in block_comments] + line_comments + [quote for quote, _, _ in strings]
+    special_bytes = sorted({opener[0] for opener in openers})
+    special = b''.join(re.escape(bytes([byte])) for byte in special_bytes)
+
+    # Pieces a run of code may still contain: a special character that does not open
+    # anything here, and strings that close on the same line
+    inline = []
+    for byte in special_bytes:
+        tails = [re.escape(opener[1:]) for opener in openers if opener[0] == byte]
+        if all(tails):
+            inline.append(re.escape(bytes([byte])) + rb'(?!' + b'|'.join(tails) + rb')')
+    for quote, escapes, multiline in strings:
+        if len(quote) == 1 and escapes and not multiline:
+            q = re.escape(quote)
+            longer = [re.escape(opener[1:]) for opener in openers if opener != quote and opener.startswith(quote)]
+            lookahead = rb'(?!' + b'|'.join(longer) + rb')' if longer else b''
+            inline.append(q + lookahead + _repeat(rb'[^' + q + rb'\\\r\n]', [rb'\\[^\r\n]']) + q)
+
+    # A line break, along with any blank lines that follow it
+    alternatives = [rb'(?P<nl>(?:\r\n|\r|\n)(?:[ \t\f\v]*(?:\r\n|\r|\n))*)']
+    if block_comments:
+        alternatives.append(rb'(?P<block>' + b'|'.join(re.escape(start) for start, _ in block_comments) + rb')')
+    if line_comments:
+        alternatives.append(rb'(?P<line>(?:' + b'|'.join(re.escape(marker) for marker in line_comments) + rb')[^\r\n]*)')
+    if strings:
+        # Longer quotes first, so triple quotes win over single ones
+        quotes = sorted((quote for quote, _, _ in strings), key=len, reverse=True)
+        alternatives.append(rb'(?P<string>' + b'|'.join(re.escape(quote) for quote in quotes) + rb')')
+    skip = comment_lines = None
+    if openers:
+        groups = alternatives[1:]
+        if line_comments:
+            markers = b'|'.join(re.escape(marker) for marker in line_comments)
+            groups[1 if block_comments else 0] = rb'(?P<line>' + markers + rb')'
+            comment_lines = re.compile(rb'(?:[ \t\f\v]*(?:' + markers + rb')[^\n]*\n)+')
+        # Code, line breaks and strings that close on their own line, then the next opener
+        skip = re.compile(_repeat(rb'[^' + special + rb']', inline) + rb'(?:' + b'|'.join(groups) + rb')?')
+    # Code runs up to the next comment or multi-line string, carrying on over any
+    # following lines that hold nothing but code
+    first = rb'[^\s' + special + rb']'
+    if inline:
+        first = rb'(?:' + first + b'|' + b'|'.join(inline) + rb')'
+    run = first + _repeat(rb'[^\r\n' + special + rb']', inline)
+    alternatives.append(rb'(?P<code>' + run + rb'(?:(?:\r\n|\r|\n)[ \t\f\v]*' + run + rb')*|\S)')
+    return (re.compile(b'|'.join(alternatives)), dict(block_comments),
+            {quote: re.compile(_quoted(quote, escapes, multiline)) for quote, escapes, multiline in strings},
+            skip, comment_lines)
+
+_SLOC_TOKENIZERS = {ext: _compile_sloc_syntax(*syntax) for ext, syntax in _SLOC_SYNTAX.items()}
+
+# A line break followed by a whitespace-only line (found by the literal '\n', which
+# is much faster than trying ^ at every position), and any character that is not whitespace
+_BLANK_LINE = re.compile(rb'\n(?=[ \t\f\v]*\r?\n)')
+_NON_SPACE = re.compile(rb'\S')
+
+def count_file(file_path, file_ext, sloc=False):
+    """
+    Counts the characters and lines of a file by reading it in binary chunks.
+
+    The counts match reading the file in text mode as UTF-8 (errors ignored) with
+    universal newlines: '\r\n' counts as one character and every '\n', '\r' or
+    '\r\n' ends a line. No per-line objects are built. HTML and .j2 files are read
+    in one piece so their embedded JavaScript and CSS can be counted as well, as are
+    all files when the code/comment/blank breakdown is wanted.
+
+    Args:
+    file_path (str): The path of the file to count.
+    file_ext (str): The extension of the file.
+    sloc (bool): If true, also break the lines down into code, comment and blank lines.
+
+    Returns:
+    dict: The 'chars' and 'lines' of the file, under 'embedded' the [chars, lines]
+          of the code embedded in it by file type, and under 'sloc' (if asked for)
+          its [code, comment, blank] lines.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    chars = 0
+    newlines = 0
+    crlf = 0
+    # True when characters follow the last line break seen
+    pending = False
+    # True when the last character decoded so far is '\r'
+    after_cr = False
+    embedded = {}
+    sloc_counts = None
+    with open(file_path, 'rb') as f:
+        if sloc or file_ext in HTML_FILE_TYPES:
+            data = f.read()
+            if file_ext in HTML_FILE_TYPES:
+                embedded = count_embedded_code(data, file_ext)
+            if sloc:
+                sloc_counts = count_sloc(data, file_ext)
+            chunks = (data,)
+        else:
+            chunks = iter(lambda: f.read(CHUNK_SIZE), b'')
+        for chunk in chunks:
+            if not chunk:
+                break
+            if chunk.isascii():
+                # A pending partial sequence before ASCII data would be ignored anyway
+                decoder.reset()
+                newlines += chunk.count(b'\n') + chunk.count(b'\r')
+                crlf += chunk.count(b'\r\n') + (after_cr and chunk[0] == 0x0A)
+                chars += len(chunk)
+                after_cr = chunk[-1] == 0x0D
+                pending = chunk[-1] not in (0x0A, 0x0D)
+            else:
+                # Line breaks are counted on the decoded text, as ignored bytes can
+                # sit between a '\r' and a '\n'
+                text = decoder.decode(chunk)
+                if text:
+                    newlines += text.count('\n') + text.count('\r')
+                    crlf += text.count('\r\n') + (after_cr and text[0] == '\n')
+                    chars += len(text)
+                    after_cr = text[-1] == '\r'
+                    pending = text[-1] not in '\r\n'
+
+    counts = {'chars': chars - crlf, 'lines': newlines - crlf + pending, 'embedded': embedded}
+    if sloc_counts is not None:
+        counts['sloc'] = sloc_counts
+    return counts
+
+def _line_breaks(data, start, end):
+    """Counts the line breaks ('\n', '\r' or '\r\n') between start and end in data."""
+    return data.count(b'\n', start, end) + data.count(b'\r', start, end) - data.count(b'\r\n', start, end)
+
+def count_sloc(data, file_ext):
+    """
+    Breaks the lines of a file down into code, comment and blank lines.
+
+    Only the comments and multi-line strings of the raw bytes are visited one by
+    one: a per-file-type pattern skips code, line breaks and strings that close on
+    their own line up to the next comment or string opener, each of which is then
+    skipped to its end in one step, and runs of lines holding only line comments
+    are taken whole. The lines and blank lines of the whole file are counted in C,
+    so most lines of a file are never looked at from Python. A line counts as code if
+    any code is on it, as a comment if it only holds (part of) a comment, and as
+    blank otherwise. Lines inside multi-line comments count as comments and lines
+    inside multi-line strings (including docstrings) as code.
+
+    Args:
+    data (bytes): The content of the file.
+    file_ext (str): The extension of the file. File types without comment syntax
+                    in _SLOC_SYNTAX only have code and blank lines.
+
+    Returns:
+    list: The [code, comment, blank] lines, which add up to the file's lines
+          (as long as it is valid UTF-8).
+    """
+    token, block_ends, string_rests, skip, comment_lines = _SLOC_TOKENIZERS.get(file_ext, _SLOC_TOKENIZERS['.json'])
+    if b'\r' in data and data.count(b'\r') != data.count(b'\r\n'):
+        # Lone '\r' line breaks, which the line patterns here do not know about
+        return _count_sloc_tokens(data, token, block_ends, string_rests)
+    size = len(data)
+    lines = data.count(b'\n')
+    last_start = data.rfind(b'\n') + 1
+    # With the whitespace taken out, blank lines are the empty ones; the piece after a
+    # final line break is not a line
+    blank = data.translate(None, b' \t\f\v\r').split(b'\n').count(b'')
+    if last_start < size:
+        lines += 1
+    else:
+        blank -= 1
+
+    # Only comment lines are counted here: blank lines are known from above, less any
+    # inside multi-line comments and strings, and all other lines are code
+    comment = 0
+    line_code = line_comment = False
+    pos = 0
+    while True:
+        # The text up to the next comment or string holds only code, line breaks and
+        # strings that close on their own line, so it is skipped in one step
+        match = skip.match(data, pos) if skip is not None else None
+        kind = match.lastgroup if match is not None else None
+        start = match.start(kind) if kind is not None else match.end() if match is not None else size
+        if pos < start:
+            first = data.find(b'\n', pos, start)
+            if first < 0:
+                line_code = line_code or _NON_SPACE.search(data, pos, start) is not None
+            else:
+                if line_comment and not line_code and _NON_SPACE.search(data, pos, first) is None:
+                    comment += 1
+                line_code = _NON_SPACE.search(data, data.rfind(b'\n', first, start) + 1, start) is not None
+                line_comment = False
+        if start >= size:
+            break
+        if kind is None:
+            # Nothing opens here after all, so it is code
+            line_code = True
+            pos = start + 1
+            continue
+        if kind == 'line':
+            if not line_code:
+                # A run of lines holding only line comments is counted in one step
+                line_start = data.rfind(b'\n', 0, start) + 1
+                run = comment_lines.match(data, line_start)
+                if run is not None:
+                    comment += data.count(b'\n', line_start, run.end())
+                    line_comment = False
+                    pos = run.end()
+                    continue
+            # The comment takes in the rest of the line
+            line_comment = True
+            pos = data.find(b'\n', match.end(kind))
+            if pos < 0:
+                pos = size
+            continue
+
+        # A block comment or string, which may run over several lines
+        if kind == 'block':
+            end_marker = block_ends[match.group(kind)]
+            end = data.find(end_marker, match.end(kind))
+            end = size if end < 0 else end + len(end_marker)
+        else:
+            end = string_rests[match.group(kind)].match(data, match.end(kind)).end()
+        first = data.find(b'\n', start, end)
+        if first >= 0:
+            # The first line ends inside the span; the lines it covers entirely
+            # take its kind, blank or not, and the last one continues after it
+            last = data.rfind(b'\n', start, end)
+            if kind == 'block':
+                if not line_code:
+                    comment += 1
+                comment += data.count(b'\n', first + 1, last + 1)
+            if last > first:
+                blank -= len(_BLANK_LINE.findall(data, first, last + 1))
+            line_end = data.find(b'\n', last + 1)
+            if last + 1 < size and _NON_SPACE.search(data, last + 1, size if line_end < 0 else line_end) is None:
+                # An unclosed span can end on a line that is otherwise blank, which it still takes
+                blank -= 1
+            line_code = line_comment = False
+        if kind == 'string':
+            line_code = True
+        else:
+            line_comment = True
+        pos = end
+
+    # The last line, if the file does not end with a line break
+    if last_start < size and line_comment and not line_code:
+        comment += 1
+    return [lines - comment - blank, comment, blank]
+
+def _count_sloc_tokens(data, token, block_ends, string_rests):
+    """
+    Breaks the lines of a file down as count_sloc does, for files with lone '\r' line breaks.
+
+    A single compiled pattern finds the next line break, comment, string or run of
+    code, and runs of blank lines and of lines holding only code are matched whole.
+
+    Args:
+    data (bytes): The content of the file.
+    token, block_ends, string_rests: The tokenizer of the file type, from _SLOC_TOKENIZERS.
+
+    Returns:
+    list: The [code, comment, blank] lines.
+    """
+    if b'\r' in data:
+        def line_breaks(start, end):
+            return _line_breaks(data, start, end)
+    else:
+        def line_breaks(start, end):
+            return data.count(b'\n', start, end)
+    code = comment = blank = 0
+    line_code = line_comment = False
+    line_start = 0
+    pos = 0
+    size = len(data)
+    while True:
+        match = token.search(data, pos)
+        if match is None:
+            break
+        kind = match.lastgroup
+        pos = match.end()
+        if kind == 'nl':
+            if line_code:
+                code += 1
+            elif line_comment:
+                comment += 1
+            else:
+                blank += 1
+            blank += line_breaks(match.start(), pos) - 1
+            line_code = line_comment = False
+            line_start = pos
+            continue
+        if kind == 'code':
+            # Every line the run ends holds code
+            code += line_breaks(match.start(), pos)
+            line_code = True
+            continue
+        if kind == 'line':
+            # The pattern takes in the rest of the line
+            line_comment = True
+            continue
+
+        # A block comment or string, which may run over several lines
+        if kind == 'block':
+            end_marker = block_ends[match.group()]
+            end = data.find(end_marker, pos)
+            end = size if end < 0 else end + len(end_marker)
+        else:
+            end = string_rests[match.group()].match(data, pos).end()
+        breaks = line_breaks(match.start(), end)
+        if breaks:
+            # The first line ends inside the span; the lines it covers entirely
+            # take its kind, and the last one continues after it
+            if line_code or kind == 'string':
+                code += 1
+            else:
+                comment += 1
+            if kind == 'string':
+                code += breaks - 1
+            else:
+                comment += breaks - 1
+            line_code = line_comment = False
+            line_start = max(data.rfind(b'\n', match.start(), end), data.rfind(b'\r', match.start(), end)) + 1
+        if kind == 'string':
+            line_code = True
+        else:
+            line_comment = True
+        pos = end
+
+    # The last line, if the file does not end with a line break
+    if line_start < size:
+        if line_code:
+            code += 1
+        elif line_comment:
+            comment += 1
+        else:
+            blank += 1
+    return [code, comment, blank]
+
+def _count_block(data, start, end, ascii_only):
+    """
+    Counts the characters and lines of the code between start and end in data.
+
+    The line break right after the opening tag and the indentation before the
+    closing tag are not counted.
+
+    Returns:
+    tuple: The characters and lines of the block.
+    """
+    if data.startswith(b'\r\n', start):
+        start += 2
+    elif data.startswith(b'\n', start) or data.startswith(b'\r', start):
+        start += 1
+    trimmed = end
+    while trimmed > start and data[trimmed - 1] in b' \t':
+        trimmed -= 1
+    if trimmed == start or data[trimmed - 1] in b'\r\n':
+        end = trimmed
+    if start >= end:
+        return 0, 0
+
+    crlf = data.count(b'\r\n', start, end)
+    lines = data.count(b'\n', start, end) + data.count(b'\r', start, end) - crlf
+    if data[end - 1] not in b'\r\n':
+        lines += 1
+    if ascii_only:
+        chars = end - start
+    else:
+        chars = len(data[start:end].decode('utf-8', errors='ignore'))
+    return chars - crlf, lines
+
+def count_embedded_code(data, file_ext='.html'):
+    """
+    Counts the JavaScript and CSS embedded in HTML or Jinja content in a single pass.
+
+    <script> and <style> blocks are found whether they span several lines or sit on
+    one, and tags inside HTML (<!-- -->) or, in .j2 files, Jinja ({# #}) comments
+    are ignored. A comment opener that is never closed is passed over rather than
+    hiding the rest of the file. The raw bytes are scanned in place, so no
+    intermediate strings are built (except to decode non-ASCII blocks).
+
+    Args:
+    data (bytes): The HTML content to scan.
+    file_ext (str): The extension of the file ('.html' or '.j2').
+
+    Returns:
+    dict: The [chars, lines] of the embedded code keyed on its file type ('.js' or
+          '.css'). File types that do not occur are left out.
+    """
+    embedded = {}
+    ascii_only = data.isascii()
+    start_pattern = _EMBED_START_J2 if file_ext == '.j2' else _EMBED_START
+    pos = 0
+    while True:
+        match = start_pattern.search(data, pos)
+        if match is None:
+            break
+        tag = match.group(1)
+        if tag is None:
+            # Skip over the comment
+            comment_end = _EMBED_COMMENT_END[match.group(0)]
+            end = data.find(comment_end, match.end())
+            pos = match.end() if end < 0 else end + len(comment_end)
+            continue
+        pos = match.end()
+        if match.group(0).endswith(b'/>'):
+            continue
+
+        tag = tag.lower()
+        close = _EMBED_END[tag].search(data, pos)
+        end = close.start() if close else len(data)
+        chars, lines = _count_block(data, pos, end, ascii_only)
+        if chars:
+            counts = embedded.setdefault(_EMBED_TYPES[tag], [0, 0])
+            counts[0] += chars
+            counts[1] += lines
+        if close is None:
+            break
+        pos = close.end()
+    return embedded
+
+def _count_batch(batch, sloc=False):
+    """
+    Counts a batch of files in a worker process.
+
+    Args:
+    batch (list): A list of (file_path, file_ext) tuples.
+    sloc (bool): If true, also count the code, comment and blank lines.
+
+    Returns:
+    list: The counts of each file, or the error message if it could not be read.
+    """
+    results = []
+    for file_path, file_ext in batch:
+        try:
+            results.append(count_file(file_path, file_ext, sloc))
+        except Exception as e:
+            results.append(str(e))
+    return results
+
+class _BatchCounter:
+    """
+    Counts files in batches, either in this process or on a pool of worker processes.
+
+    Each record handed to add is a list whose item 4 is replaced by the file's counts
+    (or the error message from _count_batch) once its batch has been counted. The
+    pool is only started once a full batch is ready, and only a bounded number of
+    batches is in flight at once.
+    """
+
+    def __init__(self, workers, sloc=False):
+        self.workers = workers
+        self.sloc = sloc
+        self.executor = None
+        self.in_flight = deque()
+        self.batch = []
+        self.records = []
+
+    def add(self, file_path, file_ext, record):
+        """Queues a file to be counted into record."""
+        self.batch.append((file_path, file_ext))
+        self.records.append(record)
+        if len(self.batch) >= BATCH_SIZE:
+            if self.executor is None and self.workers > 1:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            self.submit()
+
+    def submit(self):
+        """Sends the current (possibly partial) batch off to be counted."""
+        if not self.batch:
+            return
+        batch, records = self.batch, self.records
+        self.batch, self.records = [], []
+        if self.executor is None:
+            self._store(records, _count_batch(batch, self.sloc))
+            return
+        self.in_flight.append((self.executor.submit(_count_batch, batch, self.sloc), records))
+        if len(self.in_flight) > self.workers * 4:
+            self.wait()
+
+    def wait(self):
+        """Waits for the oldest batch in flight. Returns False if there was none."""
+        if not self.in_flight:
+            return False
+        future, records = self.in_flight.popleft()
+        self._store(records, future.result())
+        return True
+
+    def close(self):
+        """Shuts the pool down, dropping any batches that were not collected."""
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def _store(records, results):
+        for record, counts in zip(records, results):
+            record[4] = counts
+
+def load_cache(cache_file):
+    """
+    Loads the file-stats cache written by a previous run.
+
+    Args:
+    cache_file (str): The path of the cache file.
+
+    Returns:
+    dict: The cached entries keyed on the path relative to the analyzed directory,
+          or an empty dictionary if there is no usable cache.
+    """
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Ignoring unreadable cache {cache_file}: {e}")
+        return {}
+    if cache.get('version') != CACHE_VERSION:
+        return {}
+    return cache.get('files', {})
+
+def save_cache(cache_file, cache):
+    """
+    Writes the file-stats cache, replacing the previous one atomically.
+
+    Args:
+    cache_file (str): The path of the cache file.
+    cache (dict): The entries to store, as filled in by scan_directory.
+    """
+    temp_file = cache_file + '.tmp'
+    try:
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'files': cache}, f, separators=(',', ':'))
+        os.replace(temp_file, cache_file)
+    except Exception as e:
+        print(f"Error writing cache {cache_file}: {e}")
+
+def scan_directory(parent_dir, workers=None, cache=None, sloc=False):
+    """
+    Walks the specified directory and counts its tracked files, excluding folders
+    that start with "." and the "public" folder.
+
+    Args:
+    parent_dir (str): The parent directory to analyze.
+    workers (int): The number of worker processes to count files with. Defaults to
+                   the number of CPUs; 1 counts everything in this process.
+    cache (dict): Optional file-stats cache from load_cache. Files whose size, mtime
+                  and inode match their entry are not opened. The dictionary is
+                  updated in place: changed files are re-counted and stored, and
+                  entries for files that no longer exist are dropped once the walk
+                  is complete.
+    sloc (bool): If true, also count the code, comment and blank lines of each file.
+
+    Yields:
+    tuple: ('dir', indent, tree_prefix, name) for each directory, and
+           ('file', indent, name, file_ext, counts, rel_path) for each file, in walk
+           order, where rel_path is the '/'-separated path relative to parent_dir.
+           counts is None for untracked files. Files that cannot be read are
+           reported and yielded as ('error', indent, name, file_ext, file_path).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # Records waiting to be yielded, in walk order. Item 4 holds the counts, and is
+    # _PENDING until the file's batch has been counted.
+    pending = deque()
+    seen = set()
+
+    def ready():
+        while pending and pending[0][4] is not _PENDING:
+            record = pending.popleft()
+            if record[0] == 'dir':
+                yield tuple(record[:4])
+                continue
+            _, indent, file, file_ext, counts, file_path, key, signature = record
+            if isinstance(counts, str):
+                print(f"Error reading file {file_path}: {counts}", file=sys.stderr)
+                yield ('error', indent, file, file_ext, file_path)
+                continue
+            if cache is not None and counts is not None:
+                seen.add(key)
+                if signature is not None:
+                    cache[key] = signature + [counts]
+            yield ('file', indent, file, file_ext, counts, key)
+
+    counter = _BatchCounter(workers, sloc)
+    try:
+        for root, dirs, files in os.walk(parent_dir, topdown=True):
+            # Skip directories that start with "." and the "public" folder
+            dirs[:] = [d for d in dirs if not d.startswith('.') and d != 'public']
+
+            level = root.replace(parent_dir, '').count(os.sep)
+            indent = '│   ' * level
+            tree_prefix = '├── ' if level > 0 else ''
+            pending.append(['dir', indent, tree_prefix, os.path.basename(root), None])
+            rel_root = os.path.relpath(root, parent_dir).replace(os.sep, '/')
+            key_prefix = '' if rel_root == '.' else rel_root + '/'
+
+            for file in files:
+                if file in ('code_summary.py', CACHE_FILE_NAME):  # Skip the script file and its cache
+                    continue
+
+                file_path = os.path.join(root, file)
+                key = key_prefix + file
+                _, file_ext = os.path.splitext(file)
+                if file_ext not in TRACKED_FILE_TYPES:
+                    pending.append(['file', indent, file, file_ext, None, file_path, key, None])
+                    continue
+
+                signature = None
+                counts = _PENDING
+                if cache is not None:
+                    try:
+                        st = os.stat(file_path)
+                        signature = [st.st_size, st.st_mtime_ns, st.st_ino]
+                    except OSError:
+                        pass
+                    cached = cache.get(key)
+                    if (signature is not None and cached is not None and cached[:3] == signature
+                            and (not sloc or 'sloc' in cached[3])):
+                        counts = cached[3]
+                record = ['file', indent, file, file_ext, counts, file_path, key, signature]
+                pending.append(record)
+                if counts is _PENDING:
+                    counter.add(file_path, file_ext, record)
+
+            yield from ready()
+            # Don't let a partial batch hold back an ever-growing backlog of entries
+            if len(pending) > MAX_PENDING:
+                counter.submit()
+                while pending[0][4] is _PENDING and counter.wait():
+                    pass
+                yield from ready()
+
+        counter.submit()
+        while counter.wait():
+            pass
+        yield from ready()
+    finally:
+        counter.close()
+
+    if cache is not None:
+        # Drop the entries of deleted (or now unreadable) files
+        for key in [key for key in cache if key not in seen]:
+            del cache[key]
+
+def _new_type_stats(sloc):
+    """Returns the empty stats of a file type."""
+    stats = {'count': 0, 'chars': 0, 'lines': 0}
+    if sloc:
+        stats.update({'code': 0, 'comment': 0, 'blank': 0})
+    return stats
+
+def iter_directory_tree(parent_dir, file_types, totals, workers=None, cache_file=None, rescan=False, sloc=False, records=None):
+    """
+    Analyzes the specified directory, yielding the lines of its directory tree as the
+    walk proceeds while adding up the file type stats.
+
+    Args:
+    parent_dir (str): The parent directory to analyze.
+    file_types (dict): A dictionary that is filled with the file types and their counts,
+                       character sums, and LOC.
+    totals (dict): A dictionary whose 'chars' and 'lines' are set to the total characters
+                   and lines of the codebase.
+    workers (int): The number of worker processes to count files with (see scan_directory).
+    cache_file (str): Optional path of a file-stats cache. Unchanged files are taken from
+                      it, and it is rewritten once the walk is complete.
+    rescan (bool): If true, ignore the existing cache contents and count every file.
+    sloc (bool): If true, add the code, comment and blank lines of each file to its tree
+                 line and to the file type stats.
+    records (list): Optional list that (rel_path, file_ext, counts) of each counted file
+                    is appended to, for writing a snapshot.
+
+    Yields:
+    str: Each line of the directory tree.
+    """
+    totals.setdefault('chars', 0)
+    totals.setdefault('lines', 0)
+    cache = None
+    if cache_file is not None:
+        cache = {} if rescan else load_cache(cache_file)
+
+    for entry in scan_directory(parent_dir, workers, cache, sloc):
+        if entry[0] == 'dir':
+            _, indent, tree_prefix, name = entry
+            yield f"{indent}{tree_prefix}{name}/"
+            continue
+
+        file_ext = entry[3]
+
+        # Initialize file type in dictionary if not present
+        if file_ext not in file_types:
+            file_types[file_ext] = _new_type_stats(sloc)
+
+        if entry[0] == 'error':
+            continue
+
+        _, indent, file, file_ext, counts, rel_path = entry
+
+        if counts is None:
+            yield f"{indent}│   {file}"
+            continue
+
+        # Count embedded JavaScript and CSS in HTML and .j2 files
+        for embedded_ext, (embedded_chars, embedded_lines) in counts['embedded'].items():
+            # Ensure the embedded type's key is initialized
+            if embedded_ext not in file_types:
+                file_types[embedded_ext] = _new_type_stats(sloc)
+            file_types[embedded_ext]['chars'] += embedded_chars
+            file_types[embedded_ext]['lines'] += embedded_lines
+
+        totals['chars'] += counts['chars']
+        totals['lines'] += counts['lines']
+        if records is not None:
+            records.append((rel_path, file_ext, counts))
+
+        file_types[file_ext]['count'] += 1
+        file_types[file_ext]['chars'] += counts['chars']
+        file_types[file_ext]['lines'] += counts['lines']
+
+        if sloc:
+            code, comment, blank = counts['sloc']
+            file_types[file_ext]['code'] += code
+            file_types[file_ext]['comment'] += comment
+            file_types[file_ext]['blank'] += blank
+            yield f"{indent}│   {file} - {counts['chars']} chars, {counts['lines']} lines ({code} code, {comment} comment, {blank} blank)"
+        else:
+            yield f"{indent}│   {file} - {counts['chars']} chars, {counts['lines']} lines"
+
+    if cache is not None:
+        save_cache(cache_file, cache)
+
+def analyze_directory(parent_dir, workers=None, cache_file=None, rescan=False, sloc=False, records=None):
+    """
+    Analyzes the specified directory, counting the characters and lines in code files and
+    generating a directory tree, while excluding certain folders and counting embedded JS.
+
+    Args:
+    parent_dir (str): The parent directory to analyze.
+    workers (int): The number of worker processes to count files with (see scan_directory).
+    cache_file (str): Optional path of a file-stats cache. Unchanged files are taken from
+                      it, and it is rewritten with the results of this run.
+    rescan (bool): If true, ignore the existing cache contents and count every file.
+    sloc (bool): If true, also count the code, comment and blank lines (see iter_directory_tree).
+    records (list): Optional list to collect each file's counts in (see iter_directory_tree).
+
+    Returns:
+    tuple: A tuple containing a dictionary of file types with their counts, character sums, and LOC,
+           the total characters, the total lines, and a list representing the directory tree.
+    """
+    file_types = {}
+    totals = {}
+    directory_tree = list(iter_directory_tree(parent_dir, file_types, totals, workers, cache_file, rescan, sloc, records))
+    return file_types, totals['chars'], totals['lines'], directory_tree
+
+def write_type_summary(f, file_types, total_chars, total_lines):
+    """
+    Writes the statistics for each tracked file type to an open text file.
+
+    Args:
+    f (file): The file to write to.
+    file_types (dict): A dictionary of file types with their counts, character sums, and LOC.
+    total_chars (int): Total number of characters in the codebase.
+    total_lines (int): Total number of lines in the codebase.
+    """
+    f.write("\n\nSummary:\n")
+    for ext, data in file_types.items():
+        if ext in TRACKED_FILE_TYPES:
+            char_percentage = (data['chars'] / total_chars) * 100 if total_chars > 0 else 0
+            line_percentage = (data['lines'] / total_lines) * 100 if total_lines > 0 else 0
+            f.write(f"Type: {ext}, Files: {data['count']}, Total characters: {data['chars']} ({char_percentage:.2f}%), Total lines: {data['lines']} ({line_percentage:.2f}%)")
+            if 'code' in data:
+                f.write(f", Code: {data['code']}, Comment: {data['comment']}, Blank: {data['blank']}")
+            f.write("\n")
+
+def write_summary_to_file(file_types, total_chars, total_lines, directory_tree, output_file):
+    """
+    Writes the summary of the analysis and the directory tree to a text file.
+
+    Args:
+    file_types (dict): A dictionary of file types with their counts, character sums, and LOC.
+    total_chars (int): Total number of characters in the codebase.
+    total_lines (int): Total number of lines in the codebase.
+    directory_tree (list): The directory tree list.
+    output_file (str): Path to the output file where the summary will be written.
+    """
+    try:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write("Directory Tree:\n")
+            f.write("\n".join(directory_tree))
+            write_type_summary(f, file_types, total_chars, total_lines)
+    except Exception as e:
+        print(f"Error writing to file {output_file}: {e}")
+
+def stream_summary_to_file(parent_dir, output_file, workers=None, cache_file=None, rescan=False, sloc=False, records=None):
+    """
+    Analyzes the specified directory and writes the summary as the walk proceeds. Each
+    line of the directory tree goes straight to the output, and the file type stats
+    are appended at the end, so the tree is never held in memory. The cache and the
+    records still grow by one entry per file: memory use only stays flat with neither.
+
+    Args:
+    parent_dir (str): The parent directory to analyze.
+    output_file (str): Path to the output file, or "-" to write to stdout.
+    workers (int): The number of worker processes to count files with (see scan_directory).
+    cache_file (str): Optional path of a file-stats cache (see iter_directory_tree).
+    rescan (bool): If true, ignore the existing cache contents and count every file.
+    sloc (bool): If true, also count the code, comment and blank lines (see iter_directory_tree).
+    records (list): Optional list to collect each file's counts in (see iter_directory_tree).
+
+    Returns:
+    dict: The file types with their counts, character sums, and LOC.
+    """
+    file_types = {}
+    totals = {}
+    try:
+        if output_file == '-':
+            f = sys.stdout
+        else:
+            f = open(output_file, 'w', encoding='utf-8')
+        try:
+            f.write("Directory Tree:\n")
+            separator = ""
+            for line in iter_directory_tree(parent_dir, file_types, totals, workers, cache_file, rescan, sloc, records):
+                f.write(separator)
+                f.write(line)
+                separator = "\n"
+            write_type_summary(f, file_types, totals['chars'], totals['lines'])
+        finally:
+            if f is not sys.stdout:
+                f.close()
+    except Exception as e:
+        print(f"Error writing to file {output_file}: {e}", file=sys.stderr)
+    return file_types
+
+def write_snapshot(snapshot_file, parent_dir, file_types, records):
+    """
+    Writes a machine-readable snapshot of the analysis, sorted by path.
+
+    A .csv snapshot has one row per counted file. Any other name gets a JSON snapshot
+    holding the per-file rows as well as the per-type stats. Line breakdown columns
+    are left empty for files counted without it.
+
+    Args:
+    snapshot_file (str): Path of the snapshot to write.
+    parent_dir (str): The directory that was analyzed.
+    file_types (dict): A dictionary of file types with their counts, character sums, and LOC.
+    records (list): The (rel_path, file_ext, counts) of each file, as collected by
+                    iter_directory_tree.
+    """
+    records.sort(key=lambda record: record[0])
+    rows = []
+    for rel_path, file_ext, counts in records:
+        code, comment, blank = counts.get('sloc', (None, None, None))
+        rows.append([rel_path, file_ext, counts['chars'], counts['lines'], code, comment, blank])
+    try:
+        if snapshot_file.lower().endswith('.csv'):
+            with open(snapshot_file, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(SNAPSHOT_COLUMNS)
+                writer.writerows(rows)
+        else:
+            snapshot = {
+                'version': SNAPSHOT_VERSION,
+                'root': os.path.abspath(parent_dir),
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'columns': SNAPSHOT_COLUMNS,
+                'file_types': file_types,
+                'files': rows,
+            }
+            with open(snapshot_file, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, separators=(',', ':'))
+    except Exception as e:
+        print(f"Error writing snapshot {snapshot_file}: {e}", file=sys.stderr)
+
+def _iter_snapshot_files(snapshot_file):
+    """
+    Reads the per-file rows of a snapshot written by write_snapshot.
+
+    Args:
+    snapshot_file (str): Path of the .csv or JSON snapshot.
+
+    Yields:
+    tuple: (rel_path, file_ext, chars, lines) of each file, in path order.
+
+    Raises:
+    ValueError: If the rows are not sorted by path.
+    """
+    previous = None
+    if snapshot_file.lower().endswith('.csv'):
+        with open(snapshot_file, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)  # Skip the header
+            for row in reader:
+                if previous is not None and row[0] <= previous:
+                    raise ValueError(f"{snapshot_file} is not sorted by path")
+                previous = row[0]
+                yield row[0], row[1], int(row[2]), int(row[3])
+    else:
+        with open(snapshot_file, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        for row in snapshot['files']:
+            if previous is not None and row[0] <= previous:
+                raise ValueError(f"{snapshot_file} is not sorted by path")
+            previous = row[0]
+            yield row[0], row[1], row[2], row[3]
+
+def diff_snapshots(old_file, new_file, depth=1):
+    """
+    Compares two snapshots and adds up the growth by directory and by file type.
+
+    Both snapshots are read in path order and merge-joined, so the comparison takes
+    a single pass over each and only keeps the per-directory and per-type totals.
+
+    Args:
+    old_file (str): Path of the older snapshot.
+    new_file (str): Path of the newer snapshot.
+    depth (int): How many directory levels to group files by (files above that
+                 depth are grouped under their own directory, "." for the root).
+
+    Returns:
+    dict: The 'directories' and 'extensions' totals, each mapping a group to
+          [old files, new files, old lines, new lines, old chars, new chars], and
+          the number of 'added', 'removed' and 'changed' files.
+    """
+    diff = {'directories': {}, 'extensions': {}, 'added': 0, 'removed': 0, 'changed': 0}
+
+    def add(row, side):
+        rel_path, file_ext, chars, lines = row
+        directory = '/'.join(rel_path.split('/')[:-1][:depth]) or '.'
+        for groups, key in ((diff['directories'], directory), (diff['extensions'], file_ext or '(none)')):
+            totals = groups.setdefault(key, [0, 0, 0, 0, 0, 0])
+            totals[side] += 1
+            totals[2 + side] += lines
+            totals[4 + side] += chars
+
+    old_rows = _iter_snapshot_files(old_file)
+    new_rows = _iter_snapshot_files(new_file)
+    old = next(old_rows, None)
+    new = next(new_rows, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            add(old, 0)
+            diff['removed'] += 1
+            old = next(old_rows, None)
+        elif old is None or new[0] < old[0]:
+            add(new, 1)
+            diff['added'] += 1
+            new = next(new_rows, None)
+        else:
+            add(old, 0)
+            add(new, 1)
+            if old[2:] != new[2:]:
+                diff['changed'] += 1
+            old = next(old_rows, None)
+            new = next(new_rows, None)
+    return diff
+
+def write_diff(diff, f):
+    """
+    Writes the result of diff_snapshots as a text report, largest line growth first.
+
+    Args:
+    diff (dict): The result of diff_snapshots.
+    f (file): The file to write to.
+    """
+    f.write(f"Files added: {diff['added']}, removed: {diff['removed']}, changed: {diff['changed']}\n")
+    for title, groups in (("Directory", diff['directories']), ("Type", diff['extensions'])):
+        f.write(f"\nGrowth by {title.lower()}:\n")
+        ordered = sorted(groups.items(), key=lambda item: (-abs(item[1][3] - item[1][2]), item[0]))
+        for key, (old_files, new_files, old_lines, new_lines, old_chars, new_chars) in ordered:
+            f.write(f"{title}: {key}, Files: {old_files} -> {new_files} ({new_files - old_files:+d}), "
+                    f"Lines: {old_lines} -> {new_lines} ({new_lines - old_lines:+d}), "
+                    f"Characters: {old_chars} -> {new_chars} ({new_chars - old_chars:+d})\n")
+
+def main():
+    """
+    Analyzes a directory (the current working directory by default) and writes the summary to codesummary.txt.
+    """
+    parser = argparse.ArgumentParser(description="Summarize the code in a directory.")
+    parser.add_argument('directory', nargs='?', default=os.getcwd(), help="directory to analyze (default: current directory)")
+    parser.add_argument('--output', default='codesummary.txt', help="summary file to write (default: codesummary.txt)")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument('--no-cache', action='store_true', help=f"do not read or write the {CACHE_FILE_NAME} file-stats cache")
+    parser.add_argument('--rescan', action='store_true', help="ignore the cache and count every file again")
+    parser.add_argument('--sloc', action='store_true', help="break lines down into code, comment and blank lines")
+    parser.add_argument('--snapshot', metavar='FILE', help="also write a JSON (or .csv) snapshot of the per-file and per-type stats")
+    parser.add_argument('--diff', nargs=2, metavar=('OLD', 'NEW'), help="compare two snapshots instead of analyzing a directory")
+    parser.add_argument('--depth', type=int, default=1, help="directory levels to group the --diff report by (default: 1)")
+    parser.add_argument('--stream', action='store_true', help="write the tree as the walk proceeds instead of building it in memory (use --output - for stdout, and --no-cache for flat memory use)")
+    args = parser.parse_args()
+
+    if args.diff:
+        try:
+            write_diff(diff_snapshots(args.diff[0], args.diff[1], args.depth), sys.stdout)
+        except Exception as e:
+            print(f"Error comparing snapshots: {e}", file=sys.stderr)
+        return
+
+    parent_directory = args.directory
+    output_file = args.output
+    cache_file = None if args.no_cache else os.path.join(parent_directory, CACHE_FILE_NAME)
+    # Keep progress messages out of a summary that is streamed to stdout
+    log = sys.stderr if output_file == '-' else sys.stdout
+    records = [] if args.snapshot else None
+
+    if args.stream:
+        print(f"Analyzing directory and writing summary to '{output_file}'...", file=log)
+        file_types = stream_summary_to_file(parent_directory, output_file, args.workers, cache_file, args.rescan, args.sloc, records)
+    else:
+        print("Analyzing directory...", file=log)
+        file_types, total_chars, total_lines, directory_tree = analyze_directory(parent_directory, args.workers, cache_file, args.rescan, args.sloc, records)
+        print(f"Writing summary to '{output_file}'...", file=log)
+        write_summary_to_file(file_types, total_chars, total_lines, directory_tree, output_file)
+    if args.snapshot:
+        print(f"Writing snapshot to '{args.snapshot}'...", file=log)
+        write_snapshot(args.snapshot, parent_directory, file_types, records)
+    print("Analysis complete.", file=log)
+
+if __name__ == "__main__":
+    main()
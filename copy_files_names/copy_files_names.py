@@ -3,33 +3,62 @@
 This Python script is designed to copy files from subfolders within a specified directory (source folder) to the root of that directory, renaming the files in the process to avoid naming conflicts. The script is structured into functions for modularity and readability. Here's an overview of its components and functionality:
 1. get_subfolders Function:
  1.1. This function takes a directory path as input and returns a list of all subfolders within that directory. It uses os.scandir to scan the directory and filters the results to include only directories (subfolders).
-2. copy_files_from_subfolders Function:
- 2.1. This function takes a source folder path as input.
- 2.2. It first ensures that the source folder exists (creating it if necessary).
- 2.3. It then retrieves all subfolders in the source folder using the get_subfolders function.
- 2.4. For each subfolder, it iterates over all files, generating a new file name that includes the subfolder name and a sequence number to ensure uniqueness.
- 2.5. These files are then copied to the source folder.
- 2.6. The function includes error handling to print any issues encountered during the file copying process.
-3. main Function:
- 3.1. This is the entry point of the script.
- 3.2. It sets the working_folder (source folder) path and calls copy_files_from_subfolders to execute the file copying process.
- 3.3. It also includes error handling to catch and print any exceptions that occur.
-4. Execution Block (if __name__ == "__main__":):
- 4.1. This block ensures that the main function is called when the script is run directly.
+2. plan_copies Function:
+ 2.1. This function builds the full list of (source file, renamed destination, size) entries up front, before anything is copied.
+ 2.2. For each subfolder, it lists the files with os.scandir, generating a new file name that includes the subfolder name and a sequence number to ensure uniqueness.
+ 2.3. It checks the new names for collisions (ignoring case where the system does) and reports and leaves out any file whose name is already taken.
+3. copy_files_from_subfolders Function:
+ 3.1. This function takes a source folder path as input.
+ 3.2. It first ensures that the source folder exists (creating it if necessary).
+ 3.3. It then plans the copies with plan_copies and runs them on a bounded pool of worker threads. shutil.copy uses the kernel's copy (sendfile on Linux, fcopyfile on macOS) where the system has one.
+ 3.4. The function includes error handling to print any issues encountered during the file copying process, and reports the files and bytes copied, with files/s and MB/s.
+4. Deduplication (find_duplicates):
+ 4.1. With dedup set to "skip" or "hardlink", copy_files_from_subfolders copies each distinct file only once. Files that match a file already planned or already in the source folder are skipped, or hardlinked to it, and the bytes saved are reported.
+ 4.2. Candidates are grouped by size first, then by a hash of their first 64 KB, and only files that still match are hashed in full, so files with a unique size are never read.
+ 4.3. Hardlinks are only made to copies this script creates, never to other files that were already in the source folder. Copies are written to a temporary name and renamed over their destination, so a later run that recopies a changed file replaces it rather than writing through a hardlink into its duplicates.
+ 4.4. The sizes, modification times and hashes of the files in the source folder and of the subfolder files they were copied from are kept in an index file (.flatten_index.json) in that folder, so later runs into the same folder only hash new or changed files.
+5. copy_files_recursive Function:
+ 5.1. A flatten mode for trees of any depth. iter_nested_files streams the files of every folder below the source folder with os.scandir, without listing the whole tree first, and copies start while the tree is still being scanned.
+ 5.2. Each file is named after its relative path, with the folder names joined by " - " (for example "2023 - March - scan.jpg"). Files directly in the source folder are skipped, as they are already flat.
+ 5.3. New names are reserved by creating the file exclusively, so names never collide and no list of used names is kept; a taken name gets " (1)", " (2)" and so on before its extension.
+ 5.4. Only a bounded number of files is in flight at once, so memory stays flat on trees with millions of files.
+6. main Function:
+ 6.1. This is the entry point of the script.
+ 6.2. It sets the working_folder (source folder) path and calls copy_files_from_subfolders, or copy_files_recursive when recursive is set, to execute the file copying process.
+ 6.3. It also includes error handling to catch and print any exceptions that occur.
+7. Execution Block (if __name__ == "__main__":):
+ 7.1. This block ensures that the main function is called when the script is run directly.
  
 How to Use This Script:
-1. Set the Source Folder: Modify the working_folder variable in the main function to the path of your desired source directory.
+1. Set the Source Folder: Modify the working_folder variable in the main function to the path of your desired source directory. Set recursive to True to flatten every level of nested folders, not just the first. Set dedup to "skip" or "hardlink" to copy duplicate files only once.
 2. Run the Script: Execute the script. It will copy files from each subfolder into the main folder (source folder), renaming them to include the subfolder name and a unique sequence number.
 3. Check the Source Folder: After running, you should find all the files from the subfolders in your specified source folder, each renamed to prevent naming conflicts.
 
 Important Considerations:
 1. Ensure the working_folder path is correctly set to avoid any unintended actions.
 2. This script does not delete the original files or subfolders after copying, leaving them intact in their original location.
-3. The script is particularly useful for consolidating files from multiple subfolders into a single location, especially in cases where file organization and naming conflicts need to be managed.
+3. Files already in the source folder under a new name (such as from an earlier run) are overwritten.
+4. In the recursive mode nothing is overwritten: running it again makes new copies with " (n)" names.
+5. Hardlinked duplicates share their data, so changing one changes them all; use "skip" if the copies may be edited later. Hardlinks need the file system to support them (NTFS and Linux file systems do, FAT does not).
+6. The number of files copied at once is set by COPY_WORKERS; on a single spinning disk fewer workers may be faster.
+7. The script is particularly useful for consolidating files from multiple subfolders into a single location, especially in cases where file organization and naming conflicts need to be managed.
 '''
 
+import hashlib
+import json
 import os
 import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Default number of files copied at once
+COPY_WORKERS = 8
+# Bytes read for the partial hash that narrows down files of the same size
+PARTIAL_HASH_SIZE = 64 * 1024
+# Index of the sizes, times and hashes of the files in the source folder, kept for later runs
+HASH_INDEX_NAME = '.flatten_index.json'
+DEDUP_MODES = ('skip', 'hardlink')
 
 def get_subfolders(directory):
     """
@@ -43,40 +72,461 @@ def get_subfolders(directory):
     """
     return [f.path for f in os.scandir(directory) if f.is_dir()]
 
-def copy_files_from_subfolders(source_folder):
+def plan_copies(source_folder):
+    """
+    Builds the list of files to copy from the subfolders of a source folder, with
+    their new names, checking the new names for collisions.
+
+    Args:
+    source_folder (str): The path to the source folder.
+
+    Returns:
+    list: (source path, destination path, size) tuples, leaving out any file whose
+          new name collides with an earlier one.
+    """
+    copies = []
+    # New names taken so far, compared as the file system would (ignoring case on Windows)
+    taken = set()
+
+    # Iterate over each subfolder
+    for folder in get_subfolders(source_folder):
+        folder_name = os.path.basename(folder)
+        files = [f for f in os.scandir(folder) if f.is_file()]
+
+        # Iterate over each file in the subfolder
+        for i, entry in enumerate(files):
+            # Generate the new file name
+            new_file_name = f'{folder_name} - {str(i+1).zfill(3)}_{entry.name}'
+            key = os.path.normcase(new_file_name)
+            if key in taken:
+                print(f"Skipping {entry.path}: {new_file_name} is already used by another file")
+                continue
+            taken.add(key)
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                size = 0
+
+            # Create the destination path for the file
+            copies.append((entry.path, os.path.join(source_folder, new_file_name), size))
+    return copies
+
+def hash_file(file_path, limit=None):
+    """
+    Hashes a file, or only its first bytes.
+
+    Args:
+    file_path (str): The path to the file.
+    limit (int): The number of bytes to hash, or None for the whole file.
+
+    Returns:
+    str: The hex digest.
+    """
+    digest = hashlib.blake2b()
+    remaining = limit
+    with open(file_path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            chunk = f.read(1024 * 1024 if remaining is None else min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+def load_index(source_folder):
+    """
+    Loads the hash index of a source folder, or an empty one if there is none.
+
+    Args:
+    source_folder (str): The path to the source folder.
+
+    Returns:
+    dict: Under "folder", each file name in the source folder, and under "sources",
+          each subfolder file's path relative to the source folder, with its size,
+          modification time and any known hashes.
+    """
+    try:
+        with open(os.path.join(source_folder, HASH_INDEX_NAME), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    if not isinstance(index.get('folder'), dict) or not isinstance(index.get('sources'), dict):
+        return {'folder': {}, 'sources': {}}
+    return index
+
+def save_index(source_folder, index):
+    """
+    Saves the hash index of a source folder, replacing the old one in one step.
+
+    Args:
+    source_folder (str): The path to the source folder.
+    index (dict): The index, as from load_index.
+    """
+    index_path = os.path.join(source_folder, HASH_INDEX_NAME)
+    with open(index_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(index_path + '.tmp', index_path)
+
+def _index_entry(stat, cached):
+    """
+    Returns the cached index entry of a file if its size and modification time have
+    not changed, or a new entry without hashes.
+    """
+    if cached and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime_ns:
+        return cached
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'partial': None, 'full': None}
+
+def scan_folder_files(source_folder, index):
+    """
+    Lists the files directly in the source folder, reusing the hashes in the index
+    of any file whose size and modification time have not changed.
+
+    Args:
+    source_folder (str): The path to the source folder.
+    index (dict): The "folder" part of the index from load_index.
+
+    Returns:
+    dict: For each file name, its index entry.
+    """
+    files = {}
+    for entry in os.scandir(source_folder):
+        if not entry.is_file() or entry.name in (HASH_INDEX_NAME, HASH_INDEX_NAME + '.tmp'):
+            continue
+        files[entry.name] = _index_entry(entry.stat(), index.get(entry.name))
+    return files
+
+def scan_sources(source_folder, copies, index):
+    """
+    Looks up the planned copies' source files in the index, reusing the hashes of any
+    file whose size and modification time have not changed.
+
+    Args:
+    source_folder (str): The path to the source folder.
+    copies (list): The (source path, destination path, size) tuples from plan_copies.
+    index (dict): The "sources" part of the index from load_index.
+
+    Returns:
+    dict: For each source's path relative to the source folder, its index entry.
+    """
+    sources = {}
+    for file, destination_path, size in copies:
+        relative = os.path.relpath(file, source_folder)
+        try:
+            sources[relative] = _index_entry(os.stat(file), index.get(relative))
+        except OSError:
+            sources[relative] = {'size': size, 'mtime': None, 'partial': None, 'full': None}
+    return sources
+
+def find_duplicates(source_folder, copies, folder_files, source_files, executor, link=False):
+    """
+    Finds the planned copies whose content is already in the source folder or in an
+    earlier planned copy.
+
+    When linking, only folder files at a planned destination (copies made by an
+    earlier run) are used as originals, so no copy is linked to a file the user put
+    in the folder.
+
+    Files are grouped by size, then by the hash of their first PARTIAL_HASH_SIZE bytes,
+    and only files that still share a group are hashed in full. Hashes are read from
+    and added to the index entries in folder_files and source_files, so files that
+    have not changed are not read again on later runs.
+
+    Args:
+    source_folder (str): The path to the source folder.
+    copies (list): The (source path, destination path, size) tuples from plan_copies.
+    folder_files (dict): The source folder's files, from scan_folder_files.
+    source_files (dict): The copies' source files, from scan_sources.
+    executor (ThreadPoolExecutor): The pool the files are hashed on.
+    link (bool): If True, the duplicates are going to be hardlinked to their originals.
+
+    Returns:
+    tuple: For each duplicate copy's position in copies, the path of the file with the
+           same content (its own destination if that is already in place), and the
+           (partial, full) hashes of each copy that was hashed, by position.
+    """
+    # Every candidate as [path, size, partial hash, full hash, copy position (None for
+    # a folder file), index entry]
+    candidates = [[os.path.join(source_folder, name), entry['size'], entry['partial'], entry['full'], None, entry]
+                  for name, entry in folder_files.items()]
+    for i, (file, destination_path, size) in enumerate(copies):
+        entry = source_files[os.path.relpath(file, source_folder)]
+        candidates.append([file, size, entry['partial'], entry['full'], i, entry])
+
+    def narrow(groups, slot, limit):
+        # Hashes the candidates that still share a group, then splits the groups by that hash
+        shared = [c for group in groups.values() if len(group) > 1 for c in group]
+        missing = [c for c in shared if c[slot] is None]
+        for c, digest in zip(missing, executor.map(lambda c: _try_hash(c[0], limit), missing)):
+            c[slot] = digest
+            # a file no bigger than the partial hash is fully hashed by it
+            if slot == 2 and c[1] <= PARTIAL_HASH_SIZE:
+                c[3] = digest
+        split = {}
+        for c in shared:
+            if c[slot] is not None:
+                split.setdefault((c[1], c[slot]), []).append(c)
+        return split
+
+    by_size = {}
+    for c in candidates:
+        by_size.setdefault(c[1], []).append(c)
+    by_full = narrow(narrow(by_size, 2, PARTIAL_HASH_SIZE), 3, None)
+
+    for c in candidates:
+        c[5]['partial'], c[5]['full'] = c[2], c[3]
+    hashes = {c[4]: (c[2], c[3]) for c in candidates if c[4] is not None and c[2] is not None}
+
+    # A folder file stays only if no planned copy is going to overwrite it with other content
+    planned = {destination_path: i for i, (file, destination_path, size) in enumerate(copies)}
+    # Hashes of the folder files, to find copies whose destination already holds the same content
+    in_place = {c[0]: c[3] for c in candidates if c[4] is None and c[3] is not None}
+    kept = {}
+    for group in by_full.values():
+        for c in group:
+            if c[4] is not None:
+                continue
+            if c[0] in planned:
+                if hashes.get(planned[c[0]], (None, None))[1] == c[3]:
+                    kept.setdefault(c[3], c[0])
+            elif not link:
+                kept.setdefault(c[3], c[0])
+    duplicates = {}
+    for i, (file, destination_path, size) in enumerate(copies):
+        digest = hashes.get(i, (None, None))[1]
+        if digest is None:
+            continue
+        if in_place.get(destination_path) == digest:
+            duplicates[i] = destination_path
+        elif digest in kept:
+            duplicates[i] = kept[digest]
+        else:
+            kept[digest] = destination_path
+    return duplicates, hashes
+
+def _try_hash(file_path, limit):
+    """
+    Hashes a file as hash_file does, printing the error and returning None if it cannot be read.
+    """
+    try:
+        return hash_file(file_path, limit)
+    except OSError as e:
+        print(f"Error hashing {file_path}: {e}")
+        return None
+
+def copy_files_from_subfolders(source_folder, workers=COPY_WORKERS, dedup=None):
     """
     Copies files from subfolders of a given source folder into the source folder,
     renaming the files to include their subfolder name and a sequence number.
 
+    The copies are planned first (see plan_copies) and then run on a pool of worker
+    threads, with a bounded number in flight. With dedup, files whose content is
+    already in the source folder or in an earlier copy are not copied again (see
+    find_duplicates).
+
     Args:
     source_folder (str): The path to the source folder.
+    workers (int): The number of files to copy at once (1 copies them one by one).
+    dedup (str): None to copy every file, "skip" to leave duplicates out, or
+                 "hardlink" to hardlink them to the file with the same content.
+
+    Returns:
+    dict: The number of files and bytes copied, the number of errors, the number of
+          duplicates skipped or hardlinked and the bytes they saved, and the number of
+          files already in place from an earlier run.
     """
+    if dedup not in (None,) + DEDUP_MODES:
+        raise ValueError(f"Unknown dedup mode {dedup}, expected one of {', '.join(DEDUP_MODES)}")
     # Create the destination folder if it doesn't exist
     os.makedirs(source_folder, exist_ok=True)
 
-    # Get a list of all the subfolders in the source folder
-    subfolders = get_subfolders(source_folder)
+    start_time = time.perf_counter()
+    copies = plan_copies(source_folder)
+    counts = {'files': 0, 'bytes': 0, 'errors': 0, 'duplicates': 0, 'present': 0, 'saved': 0}
+    lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(max(1, workers) * 4)
+    duplicates, hashes = {}, {}
 
-    # Iterate over each subfolder
-    for folder in subfolders:
-        folder_name = os.path.basename(folder)
-        files = [f.path for f in os.scandir(folder) if f.is_file()]
-        
-        # Iterate over each file in the subfolder
-        for i, file in enumerate(files):
+    def copy_one(file, destination_path, size):
+        try:
+            # Copy the file to the destination folder under a temporary name and swap it
+            # in, so a destination hardlinked by an earlier run is replaced, not written through
             try:
-                file_name = os.path.basename(file)
-                
-                # Generate the new file name
-                new_file_name = f'{folder_name} - {str(i+1).zfill(3)}_{file_name}'
-                
-                # Create the destination path for the file
-                destination_path = os.path.join(source_folder, new_file_name)
-                
-                # Copy the file to the destination folder
-                shutil.copy(file, destination_path)
-            except Exception as e:
-                print(f"Error copying {file}: {e}")
+                shutil.copy(file, destination_path + '.tmp')
+                os.replace(destination_path + '.tmp', destination_path)
+            except BaseException:
+                if os.path.lexists(destination_path + '.tmp'):
+                    os.remove(destination_path + '.tmp')
+                raise
+            with lock:
+                counts['files'] += 1
+                counts['bytes'] += size
+        except Exception as e:
+            print(f"Error copying {file}: {e}")
+            with lock:
+                counts['errors'] += 1
+        finally:
+            in_flight.release()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        if dedup:
+            index = load_index(source_folder)
+            index['sources'] = scan_sources(source_folder, copies, index['sources'])
+            duplicates, hashes = find_duplicates(source_folder, copies, scan_folder_files(source_folder, index['folder']),
+                                                 index['sources'], executor, dedup == 'hardlink')
+        for i, (file, destination_path, size) in enumerate(copies):
+            if i in duplicates:
+                continue
+            in_flight.acquire()
+            executor.submit(copy_one, file, destination_path, size)
+
+    # Duplicates are linked once every copy is done, so the files they link to exist
+    for i, original in duplicates.items():
+        file, destination_path, size = copies[i]
+        if original != destination_path and dedup == 'hardlink':
+            try:
+                if os.path.exists(destination_path) and os.path.samefile(original, destination_path):
+                    # already linked by an earlier run
+                    raise FileExistsError
+                os.link(original, destination_path + '.tmp')
+                os.replace(destination_path + '.tmp', destination_path)
+            except FileExistsError:
+                pass
+            except OSError as e:
+                print(f"Error linking {destination_path} to {original}: {e}")
+                counts['errors'] += 1
+                continue
+        if original == destination_path:
+            counts['present'] += 1
+        else:
+            counts['duplicates'] += 1
+            counts['saved'] += size
+
+    if dedup:
+        # Records the copies' hashes, so the next run does not read them again
+        index['folder'] = scan_folder_files(source_folder, index['folder'])
+        for i, (partial, full) in hashes.items():
+            entry = index['folder'].get(os.path.basename(copies[i][1]))
+            if entry is not None and entry['size'] == copies[i][2]:
+                entry['partial'], entry['full'] = partial, full
+        try:
+            save_index(source_folder, index)
+        except OSError as e:
+            print(f"Error saving the hash index: {e}")
+
+    elapsed = time.perf_counter() - start_time
+    if elapsed > 0:
+        print(f"{counts['files']} files ({counts['bytes'] / (1024 * 1024):.1f} MB) copied in {elapsed:.2f}s: "
+              f"{counts['files'] / elapsed:.0f} files/s, {counts['bytes'] / elapsed / (1024 * 1024):.1f} MB/s")
+    if dedup:
+        print(f"{counts['duplicates']} duplicates {'skipped' if dedup == 'skip' else 'hardlinked'}, "
+              f"{counts['present']} already in place, {counts['saved'] / (1024 * 1024):.1f} MB saved")
+    return counts
+
+def iter_nested_files(source_folder):
+    """
+    Streams the files in all folders below a source folder, at any depth.
+
+    Folders are scanned one at a time with os.scandir and their files are yielded as
+    they are read, so only the folders still to be scanned are held in memory. Files
+    directly in the source folder are not included.
+
+    Args:
+    source_folder (str): The path to the source folder.
+
+    Yields:
+    tuple: The path of a file, its path relative to the source folder as a tuple of
+           names, and its size.
+    """
+    # Folders still to scan, with their relative paths
+    folders = [(f.path, (f.name,)) for f in os.scandir(source_folder) if f.is_dir(follow_symlinks=False)]
+    while folders:
+        folder, relative = folders.pop()
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        folders.append((entry.path, relative + (entry.name,)))
+                    elif entry.is_file():
+                        yield entry.path, relative + (entry.name,), entry.stat().st_size
+        except OSError as e:
+            print(f"Error scanning {folder}: {e}")
+
+def reserve_name(folder, file_name):
+    """
+    Creates an empty file for a new name in a folder, adding " (n)" if the name is taken.
+
+    The file is created exclusively, so two copies can never be given the same name.
+
+    Args:
+    folder (str): The folder to create the file in.
+    file_name (str): The wanted file name.
+
+    Returns:
+    str: The path of the reserved file.
+    """
+    stem, extension = os.path.splitext(file_name)
+    n = 0
+    while True:
+        name = file_name if n == 0 else f'{stem} ({n}){extension}'
+        destination_path = os.path.join(folder, name)
+        try:
+            os.close(os.open(destination_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return destination_path
+        except FileExistsError:
+            n += 1
+
+def copy_files_recursive(source_folder, workers=COPY_WORKERS):
+    """
+    Copies the files in all folders below a source folder, at any depth, into the
+    source folder, naming each after its relative path.
+
+    Files are copied on a pool of worker threads while the tree is still being scanned
+    (see iter_nested_files), with a bounded number in flight.
+
+    Args:
+    source_folder (str): The path to the source folder.
+    workers (int): The number of files to copy at once (1 copies them one by one).
+
+    Returns:
+    dict: The number of files and bytes copied and the number of errors.
+    """
+    start_time = time.perf_counter()
+    counts = {'files': 0, 'bytes': 0, 'errors': 0}
+    lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(max(1, workers) * 4)
+
+    def copy_one(file, relative, size):
+        destination_path = None
+        try:
+            destination_path = reserve_name(source_folder, ' - '.join(relative))
+            # Copy the file over its reserved name
+            shutil.copy(file, destination_path)
+            with lock:
+                counts['files'] += 1
+                counts['bytes'] += size
+        except Exception as e:
+            print(f"Error copying {file}: {e}")
+            if destination_path is not None:
+                try:
+                    os.remove(destination_path)
+                except OSError:
+                    pass
+            with lock:
+                counts['errors'] += 1
+        finally:
+            in_flight.release()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for file, relative, size in iter_nested_files(source_folder):
+            in_flight.acquire()
+            executor.submit(copy_one, file, relative, size)
+
+    elapsed = time.perf_counter() - start_time
+    if elapsed > 0:
+        print(f"{counts['files']} files ({counts['bytes'] / (1024 * 1024):.1f} MB) copied in {elapsed:.2f}s: "
+              f"{counts['files'] / elapsed:.0f} files/s, {counts['bytes'] / elapsed / (1024 * 1024):.1f} MB/s")
+    return counts
 
 def main():
     """
@@ -84,9 +534,16 @@ def main():
     """
     # Set the paths for the source folder
     working_folder = r"C:\test\test"
+    # Set to True to flatten every level of nested folders, named by their relative paths
+    recursive = False
+    # Set to "skip" or "hardlink" to copy files with the same content only once
+    dedup = None
 
     try:
-        copy_files_from_subfolders(working_folder)
+        if recursive:
+            copy_files_recursive(working_folder)
+        else:
+            copy_files_from_subfolders(working_folder, dedup=dedup)
         print('Files copied successfully.')
     except Exception as e:
         print(f"An error occurred: {e}")
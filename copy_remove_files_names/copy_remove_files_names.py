@@ -10,17 +10,24 @@ This Python script performs the following operations:
  4.1. Empties the content of each file (writes an empty string to it).
  4.2. Deletes each file.
  4.3.Removes the subfolder itself.
-5. Completion Message: Once the process is complete, it prints a message indicating successful file copying and cleanup.
+5. Move Files to Main Folder (move_files_to_main_folder): A flatten mode with the same end result, used by main, that moves each file instead of copying it and then emptying and deleting the original:
+ 5.1. Files are renamed into the main folder under the same "{folder} - {NNN}_{name}" names when the subfolder is on the same device, so no file data is read or written.
+ 5.2. Only when a subfolder is on another device (such as a mounted drive) is a file copied, to a temporary name first, then renamed into place, and only then is the original removed.
+ 5.3. A file that fails is left where it was, so a failure partway through never leaves a half-deleted source.
+ 5.4. Afterwards, remove_empty_subfolders removes only the subfolders that are left empty.
+ 5.5. A recursive mode (move_files_recursive) flattens trees of any depth: it streams the files below the main folder with os.scandir (iter_nested_files), names each after its relative path with the folder names joined by " - ", reserves each name by creating it exclusively (adding " (n)" when it is taken), and then removes the emptied folders from the deepest up.
+6. Completion Message: Once the process is complete, it prints a message indicating successful file moving and cleanup.
 
 How to Use This Script:
-1. Set Up the Working Folder: Modify the working_folder variable to the path of the folder containing the subfolders you want to manage.
-2. Run the Script: Execute the script. This will copy the files from each subfolder into the main folder, renaming them to prevent naming conflicts and then delete the original files and their parent subfolders.
+1. Set Up the Working Folder: Modify the working_folder variable to the path of the folder containing the subfolders you want to manage. Set recursive to True to flatten every level of nested folders, not just the first.
+2. Run the Script: Execute the script. This will move the files from each subfolder into the main folder, renaming them to prevent naming conflicts, and then delete the emptied subfolders.
 3. Check Results: After running, you should find all files from the subfolders in the main folder, each renamed and the subfolders should be removed.
 
 Important Notes:
 1. Ensure that the working_folder path is correct to avoid unintended data loss.
 2. This script will permanently delete files and folders, so use it with caution.
 3. It's advisable to backup your data before running such scripts.
+4. A subfolder that still holds anything after the move (a file that failed, or a folder of its own) is kept, and its files can be moved by running the script again.
 '''
 import os
 import shutil
@@ -90,16 +97,207 @@ def delete_subfolders(source_folder):
         except Exception as e:
             print(f"Error deleting folder {folder}: {e}")
 
+def move_files_to_main_folder(source_folder):
+    """
+    Moves files from subfolders of a given source folder into the source folder,
+    renaming them to include their subfolder name and a sequence number.
+
+    Files on the same device as the source folder are renamed in place. Files on
+    another device are copied to a temporary name in the source folder, renamed into
+    place and only then removed, so a file is never lost if a step fails.
+
+    Args:
+    source_folder (str): The path to the source folder.
+
+    Returns:
+    tuple: The number of files moved and the number of errors.
+    """
+    moved, errors = 0, 0
+    source_device = os.stat(source_folder).st_dev
+    subfolders = get_subfolders(source_folder)
+
+    # Iterate over each subfolder and move the files to the main folder
+    for folder in subfolders:
+        folder_name = os.path.basename(folder)
+        same_device = os.stat(folder).st_dev == source_device
+        files = [f.path for f in os.scandir(folder) if f.is_file()]
+
+        # Iterate over each file in the subfolder and move it to the main folder
+        for i, file in enumerate(files):
+            file_name = os.path.basename(file)
+            new_file_name = f'{folder_name} - {str(i+1).zfill(3)}_{file_name}'
+            destination_path = os.path.join(source_folder, new_file_name)
+            try:
+                if same_device:
+                    # replaces an existing file, as the copy would, on Windows too
+                    os.replace(file, destination_path)
+                else:
+                    temporary_path = destination_path + '.partial'
+                    try:
+                        shutil.copy2(file, temporary_path)
+                        if os.path.getsize(temporary_path) != os.path.getsize(file):
+                            raise OSError(f"copy of {file} is incomplete")
+                        os.replace(temporary_path, destination_path)
+                    except BaseException:
+                        if os.path.exists(temporary_path):
+                            os.remove(temporary_path)
+                        raise
+                    os.remove(file)
+                moved += 1
+            except Exception as e:
+                print(f"Error moving {file}: {e}")
+                errors += 1
+    return moved, errors
+
+def remove_empty_subfolders(source_folder):
+    """
+    Removes the subfolders of the given source folder that are empty.
+
+    Args:
+    source_folder (str): The path to the source folder.
+
+    Returns:
+    int: The number of subfolders kept because they are not empty.
+    """
+    kept = 0
+    for folder in get_subfolders(source_folder):
+        try:
+            os.rmdir(folder)  # only succeeds if the folder is empty
+        except OSError as e:
+            print(f"Keeping folder {folder}: {e}")
+            kept += 1
+    return kept
+
+def iter_nested_files(source_folder):
+    """
+    Streams the files in all folders below a source folder, at any depth.
+
+    Folders are scanned one at a time with os.scandir and their files are yielded as
+    they are read, so only the folders still to be scanned are held in memory. Files
+    directly in the source folder are not included.
+
+    Args:
+    source_folder (str): The path to the source folder.
+
+    Yields:
+    tuple: The path of a file and its path relative to the source folder as a tuple
+           of names.
+    """
+    # Folders still to scan, with their relative paths
+    folders = [(f.path, (f.name,)) for f in os.scandir(source_folder) if f.is_dir(follow_symlinks=False)]
+    while folders:
+        folder, relative = folders.pop()
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        folders.append((entry.path, relative + (entry.name,)))
+                    elif entry.is_file():
+                        yield entry.path, relative + (entry.name,)
+        except OSError as e:
+            print(f"Error scanning {folder}: {e}")
+
+def reserve_name(folder, file_name):
+    """
+    Creates an empty file for a new name in a folder, adding " (n)" if the name is taken.
+
+    Args:
+    folder (str): The folder to create the file in.
+    file_name (str): The wanted file name.
+
+    Returns:
+    str: The path of the reserved file.
+    """
+    stem, extension = os.path.splitext(file_name)
+    n = 0
+    while True:
+        name = file_name if n == 0 else f'{stem} ({n}){extension}'
+        destination_path = os.path.join(folder, name)
+        try:
+            os.close(os.open(destination_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return destination_path
+        except FileExistsError:
+            n += 1
+
+def move_files_recursive(source_folder):
+    """
+    Moves the files in all folders below a source folder, at any depth, into the
+    source folder, naming each after its relative path, then removes the emptied
+    folders.
+
+    As in move_files_to_main_folder, files are renamed on the same device and copied,
+    renamed into place and then removed across devices, so a failed file stays where
+    it was.
+
+    Args:
+    source_folder (str): The path to the source folder.
+
+    Returns:
+    tuple: The number of files moved, the number of errors and the number of folders
+           kept because they are not empty.
+    """
+    moved, errors = 0, 0
+    source_device = os.stat(source_folder).st_dev
+    for file, relative in iter_nested_files(source_folder):
+        destination_path = None
+        try:
+            destination_path = reserve_name(source_folder, ' - '.join(relative))
+            if os.stat(file).st_dev == source_device:
+                os.replace(file, destination_path)
+            else:
+                temporary_path = destination_path + '.partial'
+                try:
+                    shutil.copy2(file, temporary_path)
+                    if os.path.getsize(temporary_path) != os.path.getsize(file):
+                        raise OSError(f"copy of {file} is incomplete")
+                    os.replace(temporary_path, destination_path)
+                except BaseException:
+                    if os.path.exists(temporary_path):
+                        os.remove(temporary_path)
+                    raise
+                os.remove(file)
+            moved += 1
+        except Exception as e:
+            print(f"Error moving {file}: {e}")
+            if destination_path is not None and os.path.exists(file):
+                # gives back the reserved name, as the file stayed where it was
+                try:
+                    os.remove(destination_path)
+                except OSError:
+                    pass
+            errors += 1
+
+    # Removes the emptied folders, deepest first, keeping any that still hold something.
+    # Symlinked folders are not followed, as iter_nested_files did not move anything from them
+    kept = 0
+    for folder in [f.path for f in os.scandir(source_folder) if f.is_dir(follow_symlinks=False)]:
+        for folder_name, subfolders, files in os.walk(folder, topdown=False, followlinks=False):
+            try:
+                os.rmdir(folder_name)  # only succeeds if the folder is empty
+            except OSError as e:
+                print(f"Keeping folder {folder_name}: {e}")
+                kept += 1
+    return moved, errors, kept
+
 def main():
     """
     Main function to execute the file processing tasks.
     """
     working_folder = r"C:\test\test"
 
+    # Set to True to flatten every level of nested folders, named by their relative paths
+    recursive = False
+
     try:
-        copy_files_to_main_folder(working_folder)
-        delete_subfolders(working_folder)
-        print('Files copied successfully. Source folders emptied and deleted.')
+        if recursive:
+            moved, errors, kept = move_files_recursive(working_folder)
+        else:
+            moved, errors = move_files_to_main_folder(working_folder)
+            kept = remove_empty_subfolders(working_folder)
+        if errors or kept:
+            print(f'{moved} files moved with {errors} errors. {kept} source folders were not empty and were kept.')
+        else:
+            print('Files moved successfully. Source folders emptied and deleted.')
     except Exception as e:
         print(f"An error occurred: {e}")
 
@@ -5,23 +5,39 @@ This Python script is a file management tool that allows users to perform Copy,
  1.1. delete(file_type, start_dir): Deletes files of a specified type in a given directory and all its subdirectories. It asks for user confirmation before proceeding and prints status messages.
  1.2. copy(file_type, start_dir, end_dir): Copies files of a specified type from a starting directory to a destination directory, including creating necessary subdirectories in the destination. User confirmation is required before proceeding.
  1.3. move(file_type, start_dir, end_dir): Moves files of a specified type from a starting directory to a destination directory, similar to the copy function, but also deletes empty folders from the starting directory after moving the files.
-2. Main Function (main):
- 2.1. Handles user input to determine the action type (Copy, Move, Delete), the file type to be acted upon, and the source and destination directories.
- 2.2. Validates the existence of the starting directory and, for Copy and Move actions, the destination directory.
- 2.3. Calls the appropriate function based on the user's choice of action.
-3. User Interaction:
- 3.1. The script interacts with the user through the command line, prompting for necessary information and confirming actions.
- 3.2. Includes input validation to ensure correct and expected user inputs.
-4. Error Handling:
- 4.1. Each function includes try-except blocks to handle potential errors during file operations and provides relevant error messages to the user.
-5. Execution Block:
- 5.1. The script's execution starts in the if __name__ == "__main__": block, which calls the main function.
+2. Batch Rule Engine (run_rules):
+ 2.1. Takes a batch of rules, each with an action (copy, move or delete), a set of file extensions or glob patterns, a source directory and (for copy and move) a destination directory.
+ 2.2. Runs every rule on a source in a single traversal of its tree, so a cleanup job with many extensions walks the tree once rather than once per extension. The rules are applied to each file in order; once a move or delete rule takes a file, later rules skip it.
+ 2.3. Confirmation is optional, so the engine can be used from other scripts or scheduled jobs. The interactive delete, copy and move functions are built on it.
+ 2.4. Rules can be loaded from a JSON file (load_rules) and run from the command line (see below).
+ 2.5. Files are handled on a bounded pool of worker threads. Copies (copy_file) use the fastest way the system offers: an optional reflink clone, then the kernel's copy_file_range or sendfile, and otherwise a read/write loop with a large buffer. Permission bits are copied as with shutil.copy. Each copy is written to a temporary name next to the destination and renamed over it once complete, so a failed copy never leaves a truncated file, and copying a file onto itself (or onto a hardlink to it) is refused.
+ 2.6. Each move rule compares the devices of its source and destination once. Moves on the same device are plain renames; moves across devices are copied in parallel, checked (size, and optionally a hash) and only then unlinked (move_file). The report splits moves into renamed and copied files.
+ 2.7. In sync mode, copy rules work like an incremental backup: files whose destination already has the same size and modification time (and, optionally, the same hash) are skipped, copies get the source's modification time, and destination files matching a rule that no longer exist in its source can be deleted.
+ 2.8. Before confirming, rules are planned (plan_rules) with a single os.scandir pass that reports the number of files and bytes per action and extension. The plan can be printed on its own as a dry run, and is used to show live progress (files, bytes, rate and time left) while running, followed by a timing summary.
+3. Main Function (main):
+ 3.1. Handles user input to determine the action type (Copy, Move, Delete), the file type to be acted upon, and the source and destination directories.
+ 3.2. Validates the existence of the starting directory and, for Copy and Move actions, the destination directory.
+ 3.3. Calls the appropriate function based on the user's choice of action.
+ 3.4. When command line arguments are given, runs them as rules without any prompts instead.
+4. User Interaction:
+ 4.1. The script interacts with the user through the command line, prompting for necessary information and confirming actions.
+ 4.2. Includes input validation to ensure correct and expected user inputs.
+5. Error Handling:
+ 5.1. Each function includes try-except blocks to handle potential errors during file operations and provides relevant error messages to the user.
+6. Execution Block:
+ 6.1. The script's execution starts in the if __name__ == "__main__": block, which calls the main function.
 
 How to Use This Script:
 1. Run the Script: Place the script in a directory from where you want to perform file operations and run it.
 Follow Prompts: The script will ask you to choose an action (Copy, Move, Delete), specify a file type (extension or "*" for all files), and provide the source and (if applicable) destination directories.
-2. Confirm Action: Before executing, the script will ask for confirmation. Respond with "Y" to proceed or "N" to cancel.
+2. Confirm Action: Before executing, the script will list how many files and bytes of each extension are affected and ask for confirmation. Respond with "Y" to proceed or "N" to cancel.
 3. Check Results: After the operation is complete, the script will display a message. Check the source and destination directories to verify the changes.
+4. Run Rules Without Prompts: Pass a rules file, for example "python move_copy_delete_by_extension.py --rules rules.json --yes", where rules.json holds a list such as
+   [{"action": "copy", "types": ["jpg", "png"], "source": "C:\\photos", "destination": "D:\\backup"}, {"action": "delete", "types": ["*.tmp", "~*"], "source": "C:\\photos"}]
+   or give a single rule with --action, --types, --source and --destination. Without --yes the rules are listed and confirmed once before running.
+   --workers sets how many files are handled at once, --reflink clones files instead of copying them where the file system allows it, and --verify-hash compares hashes before unlinking files moved across devices.
+   --sync copies only new or changed files, --sync-hash also compares hashes of files that look unchanged, and --sync-delete removes destination files whose source is gone.
+   --dry-run only lists the files and bytes each action and extension would touch, and --progress shows the files, bytes, rate and time left while running.
 
 Important Considerations:
 1. Use caution, especially with the Delete and Move functions, as they can permanently alter your file system.
@@ -33,10 +49,881 @@ Important Considerations:
 7. Be aware of file permissions. The script may encounter errors if it attempts to move or delete files for which the current user does not have appropriate permissions.
 '''
 
+import argparse
+import errno
+import fnmatch
+import hashlib
+import json
 import os
 from os import path
 import shutil
 import re
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# A rule for run_rules: action is 'copy', 'move' or 'delete', patterns is a list of
+# file extensions (such as 'txt'), glob patterns (such as 'report_*.pdf') or "*" for
+# all files, and destination is None for 'delete'
+Rule = namedtuple('Rule', ['action', 'patterns', 'source', 'destination'])
+
+# What a batch of rules would touch, from plan_rules: the number of files and their
+# total bytes, and a [files, bytes] pair for each (action, extension)
+Plan = namedtuple('Plan', ['files', 'bytes', 'by_type'])
+
+RULE_ACTIONS = ('copy', 'move', 'delete')
+
+# Default number of files copied, moved or deleted at once
+COPY_WORKERS = 8
+# Largest chunk asked of one copy_file_range or sendfile call
+KERNEL_COPY_SIZE = 1024 * 1024 * 1024
+# Buffer size of the read/write copy used when the kernel calls are not available
+COPY_BUFFER_SIZE = 8 * 1024 * 1024
+# Largest difference in modification times, in seconds, of files a sync treats as
+# unchanged (FAT and some network shares only keep times to 2 seconds)
+MTIME_TOLERANCE = 2
+# Seconds between progress updates on a terminal, and between progress lines written
+# to a log or pipe
+PROGRESS_INTERVAL = 0.5
+PROGRESS_LOG_INTERVAL = 30
+# ioctl that makes a reflink clone of a file on Linux (Btrfs, XFS and others)
+FICLONE = 0x40049409 if fcntl is not None and sys.platform.startswith('linux') else None
+# Errors meaning a kernel copy call does not work for a pair of files, so the next way is tried
+_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF, errno.EOPNOTSUPP,
+                    getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP), errno.ENOTSOCK}
+
+def _compile_patterns(patterns):
+    """
+    Builds a matcher for a rule's file extensions and glob patterns.
+
+    Args:
+    patterns (list): File extensions, glob patterns or "*" for all files.
+
+    Returns:
+    function: Takes a file name and returns True if it matches.
+    """
+    if "*" in patterns:
+        return lambda filename: True
+    extensions = tuple(f'.{pattern.lstrip(".")}' for pattern in patterns if not any(c in pattern for c in '*?['))
+    globs = [pattern for pattern in patterns if any(c in pattern for c in '*?[')]
+    glob_regex = re.compile('|'.join(fnmatch.translate(pattern) for pattern in globs)) if globs else None
+    def matches(filename):
+        return filename.endswith(extensions) or (glob_regex is not None and glob_regex.match(filename) is not None)
+    return matches
+
+def _destination_folder(start_dir, folder_name, end_dir):
+    """
+    Finds the folder in end_dir that matches folder_name's place under start_dir.
+
+    Uses the relative path, so it works with both Windows and Linux separators.
+
+    Args:
+    start_dir (str): The starting directory.
+    folder_name (str): A folder in the starting directory's tree.
+    end_dir (str): The destination directory.
+
+    Returns:
+    str: The matching destination folder.
+    """
+    relative = os.path.relpath(folder_name, start_dir)
+    # the start_dir itself maps straight to the end_dir
+    if relative == os.curdir:
+        return end_dir
+    return os.path.join(end_dir, relative)
+
+def _make_folder(folder, created):
+    """
+    Makes a destination folder once, remembering the folders already made.
+
+    Args:
+    folder (str): The folder to make, along with any missing parents.
+    created (set): The folders made so far in this run.
+    """
+    if folder not in created:
+        # makes the folders, and if the folder exists, just moves on
+        os.makedirs(folder, exist_ok=True)
+        created.add(folder)
+
+def describe_rules(rules):
+    """
+    Prints a summary of what each rule will do.
+
+    Args:
+    rules (list): The Rule tuples.
+    """
+    for rule in rules:
+        types = ', '.join(rule.patterns)
+        if rule.action == 'delete':
+            print(f"Delete files matching {types} from {rule.source} and all sub-folders")
+        else:
+            print(f"{rule.action.capitalize()} files matching {types} from {rule.source} and all sub-folders to {rule.destination}")
+
+def plan_rules(rules):
+    """
+    Works out which files a batch of rules would touch, without changing anything.
+
+    Each source tree is scanned once with os.scandir, whose entries carry the stat
+    data, and the files are matched against the rules as run_rules would match them.
+    In sync mode some of the copies may turn out to be up to date, so the plan is an
+    upper bound.
+
+    Args:
+    rules (list): The Rule tuples.
+
+    Returns:
+    Plan: The number of files and bytes, in total and per action and extension.
+    """
+    files, total_bytes, by_type = 0, 0, {}
+    sources = {}
+    for rule in rules:
+        sources.setdefault(rule.source, []).append((rule, _compile_patterns(rule.patterns)))
+    for start_dir, source_rules in sources.items():
+        folders = [start_dir]
+        while folders:
+            folder = folders.pop()
+            try:
+                entries = list(os.scandir(folder))
+            except OSError as e:
+                print(f"An error occurred scanning {folder}: {e}")
+                continue
+            for entry in entries:
+                try:
+                    # Like the walk in run_rules, links to folders count as folders but are not followed
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            folders.append(entry.path)
+                        continue
+                    size = entry.stat().st_size
+                except OSError:
+                    # a broken link, which still gets copied, moved or deleted as a link
+                    size = 0
+                extension = path.splitext(entry.name)[1].lower() or '(none)'
+                matched = False
+                for rule, matches in source_rules:
+                    if not matches(entry.name):
+                        continue
+                    matched = True
+                    totals = by_type.setdefault((rule.action, extension), [0, 0])
+                    totals[0] += 1
+                    totals[1] += size
+                    if rule.action != 'copy':
+                        # The file will be gone, so later rules cannot apply to it
+                        break
+                if matched:
+                    files += 1
+                    total_bytes += size
+    return Plan(files, total_bytes, by_type)
+
+def print_plan(plan):
+    """
+    Prints the files and bytes a plan touches, per action and extension.
+
+    Args:
+    plan (Plan): The plan from plan_rules.
+    """
+    for (action, extension), (files, size) in sorted(plan.by_type.items()):
+        print(f"  {action.capitalize():<7}{extension:<12}{files:>10} files {_format_size(size):>12}")
+    print(f"In total {plan.files} files, {_format_size(plan.bytes)}")
+
+def _format_size(size):
+    """
+    Formats a number of bytes for reading, such as "1.5 GB".
+    """
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+def _format_duration(seconds):
+    """
+    Formats a number of seconds as H:MM:SS.
+    """
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}"
+
+def confirm(prompt="Y or N? "):
+    """
+    Asks the user to answer Y or N.
+
+    Returns:
+    bool: True for Y.
+    """
+    confirm_action = input(prompt)
+    print()
+    # Guarantees that it is either N or Y so it can proceed
+    while confirm_action != "Y" and confirm_action != "N":
+        confirm_action = input(prompt)
+        print()
+    return confirm_action == "Y"
+
+def copy_file(src_path, dst_path, reflink=False):
+    """
+    Copies a file's data and permission bits, using the fastest way the system offers.
+
+    Tries, in order: a reflink clone (only if asked for, on file systems such as Btrfs
+    or XFS that share the data blocks), os.copy_file_range (which lets the kernel or a
+    network file system copy server-side), os.sendfile, and finally a read/write loop
+    with a large reused buffer.
+
+    The data goes to a temporary file in the destination folder, which then replaces
+    the destination, so an existing destination is only swapped out once the copy is
+    complete (and hardlinks to it are left untouched).
+
+    Args:
+    src_path (str): The file to copy.
+    dst_path (str): The file to copy it to, which is replaced if it exists.
+    reflink (bool): If True, try a reflink clone first.
+
+    Returns:
+    tuple: The number of bytes copied and the method used.
+
+    Raises:
+    shutil.SameFileError: If the destination is the source itself or a hardlink to it.
+    """
+    with open(src_path, 'rb') as fsrc:
+        src_stat = os.fstat(fsrc.fileno())
+        try:
+            dst_stat = os.stat(dst_path)
+        except FileNotFoundError:
+            dst_stat = None
+        if dst_stat is not None and (dst_stat.st_dev, dst_stat.st_ino) == (src_stat.st_dev, src_stat.st_ino):
+            raise shutil.SameFileError(f"{src_path} and {dst_path} are the same file")
+        dst_folder, dst_name = os.path.split(dst_path)
+        tmp_fd, tmp_path = tempfile.mkstemp(prefix='.' + dst_name + '.', suffix='.partial', dir=dst_folder or '.')
+        try:
+            with open(tmp_fd, 'wb') as fdst:
+                copied, method = _copy_data(fsrc, fdst, src_stat.st_size, reflink)
+            # copies the permission bits, like shutil.copy
+            shutil.copymode(src_path, tmp_path)
+            os.replace(tmp_path, dst_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+    return copied, method
+
+def _copy_data(fsrc, fdst, size, reflink):
+    """
+    Copies the data of one open file into another, for copy_file.
+
+    Args:
+    fsrc (file): The source, opened for binary reading.
+    fdst (file): The destination, opened for binary writing.
+    size (int): The size of the source file.
+    reflink (bool): If True, try a reflink clone first.
+
+    Returns:
+    tuple: The number of bytes copied and the method used.
+    """
+    infd, outfd = fsrc.fileno(), fdst.fileno()
+    copied, method = None, None
+    if reflink and FICLONE is not None:
+        try:
+            fcntl.ioctl(outfd, FICLONE, infd)
+            copied, method = size, 'reflink'
+        except OSError:
+            pass
+    if copied is None and hasattr(os, 'copy_file_range'):
+        copied = _kernel_copy(lambda: os.copy_file_range(infd, outfd, KERNEL_COPY_SIZE), size)
+        method = 'copy_file_range'
+    if copied is None and hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        copied = _kernel_copy(lambda: os.sendfile(outfd, infd, None, KERNEL_COPY_SIZE), size)
+        method = 'sendfile'
+    if copied is None:
+        buffer = memoryview(bytearray(COPY_BUFFER_SIZE))
+        copied, method = 0, 'buffer'
+        while True:
+            n = fsrc.readinto(buffer)
+            if not n:
+                break
+            fdst.write(buffer[:n])
+            copied += n
+    return copied, method
+
+def _kernel_copy(copy_chunk, size):
+    """
+    Copies a file with a kernel copy call, one call per chunk.
+
+    Args:
+    copy_chunk (function): Copies the next chunk and returns the bytes copied.
+    size (int): The size of the source file.
+
+    Returns:
+    int: The number of bytes copied, or None if the call does not work for these files
+         and nothing has been copied yet.
+    """
+    copied = 0
+    while True:
+        try:
+            n = copy_chunk()
+        except OSError as e:
+            # not supported here (another file system, an older kernel and so on)
+            if copied == 0 and e.errno in _FALLBACK_ERRNOS:
+                return None
+            raise
+        if n == 0:
+            # some file systems report nothing copied rather than an error
+            if copied == 0 and size > 0:
+                return None
+            return copied
+        copied += n
+
+def _file_hash(file_path):
+    """
+    Hashes a file's contents in chunks.
+
+    Args:
+    file_path (str): The file to hash.
+
+    Returns:
+    bytes: The BLAKE2b digest.
+    """
+    digest = hashlib.blake2b()
+    buffer = memoryview(bytearray(COPY_BUFFER_SIZE))
+    with open(file_path, 'rb') as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            digest.update(buffer[:n])
+    return digest.digest()
+
+def move_file(src_path, dst_path, same_device, verify_hash=False, reflink=False):
+    """
+    Moves a file, by renaming it on the same device or by copying and unlinking it.
+
+    A move across devices copies the file with copy_file, copies its timestamps,
+    checks the copy has the same size (and, if asked, the same hash), and only then
+    unlinks the source. A rename that fails because the file sits on another mount
+    inside the source tree falls back to the copy.
+
+    Args:
+    src_path (str): The file to move.
+    dst_path (str): Where to move it, replacing any file already there.
+    same_device (bool): If True, the source and destination were found to be on the same device.
+    verify_hash (bool): If True, compare hashes of the source and the copy before unlinking.
+    reflink (bool): If True, try a reflink clone for the copy.
+
+    Returns:
+    tuple: 'renamed' or 'copied', and the number of bytes copied.
+    """
+    if same_device:
+        try:
+            os.replace(src_path, dst_path)
+            return 'renamed', 0
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+    copied, method = copy_file(src_path, dst_path, reflink)
+    shutil.copystat(src_path, dst_path)
+    if os.path.getsize(dst_path) != os.path.getsize(src_path) or (verify_hash and _file_hash(src_path) != _file_hash(dst_path)):
+        os.remove(dst_path)
+        raise OSError(f"The copy of {src_path} did not match, so the source was kept")
+    os.remove(src_path)
+    return 'copied', copied
+
+class _Pruner:
+    """
+    Removes folders of a source tree that become empty, each exactly once.
+
+    Keeps the number of entries left in every folder: the count is set when the
+    bottom-up walk lists the folder and goes down as its files are moved or deleted
+    and its subfolders are removed. A folder is removed when its count reaches zero,
+    which then counts against its parent. Folders that were empty to begin with, and
+    the source folder itself, are never removed. Safe to share between threads.
+    """
+
+    def __init__(self, start_dir):
+        self.start_dir = start_dir
+        self.lock = threading.Lock()
+        self.remaining = {}
+        self.listed = set()
+        self.pruned = 0
+
+    def list_folder(self, folder, entries):
+        """
+        Counts a folder's entries once the walk has listed it.
+
+        Args:
+        folder (str): The folder.
+        entries (int): The number of files and subfolders in it.
+        """
+        with self.lock:
+            # Removals that finished before the folder was listed are already counted
+            count = self.remaining.get(folder, 0) + entries
+            self.remaining[folder] = count
+            self.listed.add(folder)
+            if entries and count == 0:
+                self._prune(folder)
+
+    def removed(self, folder):
+        """
+        Counts an entry moved or deleted from a folder.
+
+        Args:
+        folder (str): The folder the entry was in.
+        """
+        with self.lock:
+            self.remaining[folder] = self.remaining.get(folder, 0) - 1
+            if folder in self.listed and self.remaining[folder] == 0:
+                self._prune(folder)
+
+    def _prune(self, folder):
+        # Removes the folder, then any parents it leaves empty
+        while folder != self.start_dir:
+            try: os.rmdir(folder)
+            # something else was added to the folder, so just move on
+            except OSError: return
+            self.pruned += 1
+            del self.remaining[folder]
+            folder = os.path.dirname(folder)
+            self.remaining[folder] = self.remaining.get(folder, 0) - 1
+            if folder not in self.listed or self.remaining[folder] != 0:
+                return
+
+class _Progress:
+    """
+    Prints the progress of a run against its plan: files, bytes, rate and time left.
+
+    On a terminal one line is redrawn in place; otherwise, such as when the output is
+    logged, a line is written every PROGRESS_LOG_INTERVAL seconds. Updates come from
+    the worker threads, so they are guarded by a lock.
+    """
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.files = 0
+        self.bytes = 0
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.lock = threading.Lock()
+        self.tty = sys.stdout.isatty()
+        self.interval = PROGRESS_INTERVAL if self.tty else PROGRESS_LOG_INTERVAL
+
+    def update(self, size):
+        """
+        Counts one handled file of the given size, printing the progress when it is due.
+        """
+        with self.lock:
+            self.files += 1
+            self.bytes += size
+            now = time.perf_counter()
+            if now - self.last >= self.interval:
+                self.last = now
+                self._print(now)
+
+    def _print(self, now):
+        elapsed = now - self.start
+        # Time left goes by bytes when there are any, as big files take longer
+        if self.plan.bytes:
+            done, total = self.bytes, self.plan.bytes
+        else:
+            done, total = self.files, self.plan.files
+        eta = _format_duration((total - done) * elapsed / done) if done and total >= done else "?"
+        line = (f"{self.files}/{self.plan.files} files, {_format_size(self.bytes)}/{_format_size(self.plan.bytes)}, "
+                f"{_format_size(self.bytes / elapsed if elapsed else 0)}/s, ETA {eta}")
+        if self.tty:
+            print(f"\r{line:<79}", end='', flush=True)
+        else:
+            print(line, flush=True)
+
+    def finish(self):
+        """
+        Prints the final progress, ending the line redrawn on a terminal.
+        """
+        with self.lock:
+            self._print(time.perf_counter())
+            if self.tty:
+                print()
+
+def up_to_date(src_path, dst_path, check_hash=False):
+    """
+    Checks whether a destination file already matches its source, as a sync would.
+
+    The files match when they have the same size and their modification times are
+    within MTIME_TOLERANCE of each other (and, if asked, the same hash).
+
+    Args:
+    src_path (str): The source file.
+    dst_path (str): The destination file, which may not exist.
+    check_hash (bool): If True, also compare hashes of the two files.
+
+    Returns:
+    bool: True if the destination does not need copying again.
+    """
+    try:
+        dst_stat = os.stat(dst_path)
+    except FileNotFoundError:
+        return False
+    src_stat = os.stat(src_path)
+    if src_stat.st_size != dst_stat.st_size or abs(src_stat.st_mtime - dst_stat.st_mtime) > MTIME_TOLERANCE:
+        return False
+    return not check_hash or _file_hash(src_path) == _file_hash(dst_path)
+
+def sync_file(src_path, dst_path, check_hash=False, reflink=False):
+    """
+    Copies a file only if the destination is missing or differs, then matches its times.
+
+    Args:
+    src_path (str): The source file.
+    dst_path (str): The destination file.
+    check_hash (bool): If True, files with the same size and time are also compared by hash.
+    reflink (bool): If True, try a reflink clone for the copy.
+
+    Returns:
+    int: The number of bytes copied, or None if the destination was already up to date.
+    """
+    if up_to_date(src_path, dst_path, check_hash):
+        return None
+    copied, method = copy_file(src_path, dst_path, reflink)
+    # gives the copy the source's times, so the next sync sees it as up to date
+    src_stat = os.stat(src_path)
+    os.utime(dst_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return copied
+
+def delete_extraneous(rule, matches, kept):
+    """
+    Deletes files in a rule's destination that no longer exist in its source.
+
+    Only files matching the rule's patterns are considered, so anything else in the
+    destination is left alone.
+
+    Args:
+    rule (Rule): The copy rule.
+    matches (function): The matcher for the rule's patterns.
+    kept (set): Destination files written or checked in this run, which are never deleted.
+
+    Returns:
+    tuple: The number of files deleted and the number of errors.
+    """
+    deleted, errors = 0, 0
+    for folderName, subfolders, filenames in os.walk(rule.destination):
+        relative = os.path.relpath(folderName, rule.destination)
+        src_folder = rule.source if relative == os.curdir else os.path.join(rule.source, relative)
+        for filename in filenames:
+            dst_path = os.path.join(folderName, filename)
+            if not matches(filename) or dst_path in kept or os.path.lexists(os.path.join(src_folder, filename)):
+                continue
+            try:
+                os.remove(dst_path)
+                deleted += 1
+            except OSError as e:
+                print(f"An error occurred with {dst_path}: {e}")
+                errors += 1
+    return deleted, errors
+
+def _apply_actions(src_path, filename, actions, reflink, counts, lock, verify_hash=False, on_removed=None,
+                   sync=False, sync_hash=False):
+    """
+    Runs the actions of one file in order.
+
+    Args:
+    src_path (str): The file.
+    filename (str): The file's name.
+    actions (list): (action, destination folder, same device) tuples, with at most one
+                    move or delete and only as the last action.
+    reflink (bool): If True, try reflink clones for copies.
+    counts (dict): The counts to add to.
+    lock (threading.Lock): Guards counts.
+    verify_hash (bool): If True, moves across devices compare hashes before unlinking.
+    on_removed (function): Called once the file has been moved or deleted.
+    sync (bool): If True, copies skip destinations that are already up to date.
+    sync_hash (bool): If True, syncing also compares hashes of files with the same size and time.
+    """
+    for action, current_end_dir, same_device in actions:
+        try:
+            if action == 'delete':
+                os.remove(src_path)
+                key, copied = 'deleted', 0
+            elif action == 'copy' and sync:
+                copied = sync_file(src_path, os.path.join(current_end_dir, filename), sync_hash, reflink)
+                key = 'copied' if copied is not None else 'skipped'
+                copied = copied or 0
+            elif action == 'copy':
+                copied, method = copy_file(src_path, os.path.join(current_end_dir, filename), reflink)
+                key = 'copied'
+            else:
+                how, copied = move_file(src_path, os.path.join(current_end_dir, filename), same_device, verify_hash, reflink)
+                key = 'moved'
+            with lock:
+                counts[key] += 1
+                counts['bytes'] += copied
+                if key == 'moved':
+                    counts['renamed' if how == 'renamed' else 'copied_moves'] += 1
+            if key in ('moved', 'deleted') and on_removed is not None:
+                on_removed()
+        except FileNotFoundError:
+            print(f"File not found: {src_path}")
+            with lock:
+                counts['errors'] += 1
+        except PermissionError:
+            print(f"Permission denied: {src_path}")
+            with lock:
+                counts['errors'] += 1
+        except OSError as e:
+            print(f"An error occurred with {src_path}: {e}")
+            with lock:
+                counts['errors'] += 1
+
+def run_rules(rules, confirm_first=False, workers=COPY_WORKERS, reflink=False, verify_hash=False, sync=False,
+              sync_hash=False, sync_delete=False, dry_run=False, progress=False, plan=None):
+    """
+    Runs a batch of copy, move and delete rules, walking each source tree once.
+
+    Rules that share a source are run together in a single bottom-up traversal of it.
+    Each file is checked against the rules in order; every matching copy rule copies
+    it, and the first matching move or delete rule takes it, after which later rules
+    skip it. Folders left empty by the moves and deletes are removed, each once, as
+    soon as they empty (see _Pruner), apart from the source folder itself.
+
+    Where the system has os.fwalk, the tree is walked with open folder descriptors,
+    and files that are only deleted are unlinked relative to their folder's
+    descriptor, so long paths are not looked up again for every file.
+
+    Files are handled on a pool of worker threads, with a bounded number of files in
+    flight so memory stays flat on huge trees. The actions of a single file always
+    run in order on one thread, so a copy finishes before the same file is moved.
+
+    Before confirming, for a dry run, or to show progress, the rules are planned first
+    (see plan_rules) so the number of files and bytes they touch is known up front.
+
+    Each move rule compares the devices of its source and destination once. On the
+    same device files are renamed; across devices they are copied, checked and
+    unlinked (see move_file).
+
+    Args:
+    rules (list): The Rule tuples to run.
+    confirm_first (bool): If True, list the rules and ask for confirmation before running.
+    workers (int): The number of files to handle at once (1 handles them one by one).
+    reflink (bool): If True, copies try a reflink clone first, sharing the data
+                    blocks where the file system supports it.
+    verify_hash (bool): If True, moves across devices compare the hashes of the source
+                        and the copy, not just their sizes, before unlinking the source.
+    sync (bool): If True, copy rules only copy files that are new or changed, judged by
+                 size and modification time (see up_to_date).
+    sync_hash (bool): If True, syncing also compares hashes of files whose size and
+                      time match.
+    sync_delete (bool): If True, syncing also deletes files matching a copy rule from
+                        its destination when they no longer exist in its source.
+    dry_run (bool): If True, only print the plan, without changing anything.
+    progress (bool): If True, print the files and bytes handled, the rate and the
+                     time left while running.
+    plan (Plan): The plan of these rules if already made, so it is not made again.
+
+    Returns:
+    dict: The number of files copied, skipped as up to date, moved (split into
+          renamed and copied) and deleted, the number of errors, the number of bytes
+          copied, the number of empty folders removed and the number of extraneous
+          destination files deleted by a sync, or None if the user canceled the run.
+    """
+    counts = {'copied': 0, 'skipped': 0, 'moved': 0, 'renamed': 0, 'copied_moves': 0, 'deleted': 0, 'errors': 0,
+              'bytes': 0, 'pruned': 0, 'extraneous': 0}
+    for rule in rules:
+        if rule.action not in RULE_ACTIONS:
+            raise ValueError(f"Unknown action {rule.action}, expected one of {', '.join(RULE_ACTIONS)}")
+        if rule.action != 'delete' and not rule.destination:
+            raise ValueError(f"The {rule.action} rule for {rule.source} needs a destination")
+    if plan is None and (confirm_first or dry_run or progress):
+        plan = plan_rules(rules)
+    if confirm_first or dry_run:
+        describe_rules(rules)
+        print_plan(plan)
+    if dry_run:
+        return counts
+    if confirm_first:
+        if not confirm():
+            print("Canceled")
+            return None
+
+    # Destination folders already made, so makedirs runs once per folder
+    created = set()
+    # Group the rules by source, keeping their order, so each tree is walked once
+    sources = {}
+    for rule in rules:
+        # Whether a move rule's source and destination are on the same device, checked once
+        same_device = False
+        if rule.action == 'move' and path.isdir(rule.source):
+            try:
+                _make_folder(rule.destination, created)
+                same_device = os.stat(rule.source).st_dev == os.stat(rule.destination).st_dev
+            except OSError as e:
+                print(f"An error occurred checking {rule.destination}: {e}")
+        sources.setdefault(rule.source, []).append((rule, _compile_patterns(rule.patterns), same_device))
+    lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(max(1, workers) * 4)
+    executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    pruners = []
+    # Destination files of sync copies in this run, which are never deleted as extraneous
+    kept = set()
+    tracker = _Progress(plan) if progress else None
+
+    def run(src_path, filename, actions, on_removed):
+        try:
+            size = 0
+            if tracker is not None:
+                try:
+                    size = os.stat(src_path).st_size
+                except OSError:
+                    pass
+            _apply_actions(src_path, filename, actions, reflink, counts, lock, verify_hash, on_removed, sync, sync_hash)
+            if tracker is not None:
+                tracker.update(size)
+        finally:
+            in_flight.release()
+
+    try:
+        for start_dir, source_rules in sources.items():
+            if not path.isdir(start_dir):
+                print(f"Directory does not exist: {start_dir}")
+                counts['errors'] += 1
+                continue
+            # so that folder names from the walk and their parents always match
+            start_dir = os.path.normpath(start_dir)
+            pruner = _Pruner(start_dir)
+            pruners.append(pruner)
+            # This walks every folder, deepest first, with lists of its sub-folders and
+            # file names (and an open descriptor of it where os.fwalk is available)
+            if hasattr(os, 'fwalk'):
+                walk = os.fwalk(start_dir, topdown=False)
+            else:
+                walk = ((folder, subfolders, filenames, None) for folder, subfolders, filenames in os.walk(start_dir, topdown=False))
+            for folderName, subfolders, filenames, folder_fd in walk:
+                # Destination folder of each rule for this folder, worked out once when first needed
+                destinations = {}
+                on_removed = lambda folder=folderName, pruner=pruner: pruner.removed(folder)
+                for filename in filenames:
+                    actions = []
+                    for index, (rule, matches, same_device) in enumerate(source_rules):
+                        if not matches(filename):
+                            continue
+                        current_end_dir = None
+                        if rule.action != 'delete':
+                            current_end_dir = destinations.get(index)
+                            if current_end_dir is None:
+                                current_end_dir = _destination_folder(start_dir, folderName, rule.destination)
+                                destinations[index] = current_end_dir
+                            try:
+                                _make_folder(current_end_dir, created)
+                            except OSError as e:
+                                print(f"An error occurred making {current_end_dir}: {e}")
+                                with lock:
+                                    counts['errors'] += 1
+                                continue
+                        actions.append((rule.action, current_end_dir, same_device))
+                        if rule.action == 'copy' and sync_delete:
+                            kept.add(os.path.join(current_end_dir, filename))
+                        if rule.action != 'copy':
+                            # The file will be gone, so later rules cannot apply to it
+                            break
+                    if not actions:
+                        continue
+                    src_path = os.path.join(folderName, filename)
+                    if actions == [('delete', None, False)] and folder_fd is not None:
+                        # A plain delete is quick, so unlink it here relative to the open folder
+                        try:
+                            size = os.stat(filename, dir_fd=folder_fd).st_size if tracker is not None else 0
+                            os.unlink(filename, dir_fd=folder_fd)
+                        except OSError as e:
+                            print(f"An error occurred with {src_path}: {e}")
+                            with lock:
+                                counts['errors'] += 1
+                        else:
+                            with lock:
+                                counts['deleted'] += 1
+                            pruner.removed(folderName)
+                            if tracker is not None:
+                                tracker.update(size)
+                        continue
+                    in_flight.acquire()
+                    if executor is not None:
+                        executor.submit(run, src_path, filename, actions, on_removed)
+                    else:
+                        run(src_path, filename, actions, on_removed)
+                pruner.list_folder(folderName, len(subfolders) + len(filenames))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if tracker is not None:
+            tracker.finish()
+    counts['pruned'] = sum(pruner.pruned for pruner in pruners)
+
+    if sync and sync_delete:
+        for source_rules in sources.values():
+            for rule, matches, same_device in source_rules:
+                if rule.action == 'copy' and path.isdir(rule.source) and path.isdir(rule.destination):
+                    deleted, errors = delete_extraneous(rule, matches, kept)
+                    counts['extraneous'] += deleted
+                    counts['errors'] += errors
+    return counts
+
+def print_summary(counts, elapsed):
+    """
+    Prints what a run did and how long it took.
+
+    Args:
+    counts (dict): The counts from run_rules.
+    elapsed (float): The time the run took, in seconds.
+    """
+    print(f"{counts['copied']} copied, {counts['skipped']} up to date, {counts['moved']} moved ({counts['renamed']} renamed, "
+          f"{counts['copied_moves']} copied across devices), {counts['deleted']} deleted, {counts['errors']} errors, "
+          f"{counts['pruned']} empty folders removed, {counts['extraneous']} extraneous files deleted")
+    files = counts['copied'] + counts['skipped'] + counts['moved'] + counts['deleted']
+    rate = f", {files / elapsed:.0f} files/s" if elapsed > 0 else ""
+    print(f"Took {_format_duration(elapsed)} ({elapsed:.2f}s){rate}")
+    if counts['bytes'] and elapsed > 0:
+        print(f"{counts['bytes'] / (1024 * 1024):.1f} MB copied: {counts['bytes'] / elapsed / (1024 * 1024):.1f} MB/s")
+
+def _run_interactive(rule, plan):
+    """
+    Runs one confirmed rule for the interactive functions, with progress and a timing summary.
+
+    Args:
+    rule (Rule): The rule.
+    plan (Plan): The rule's plan, already shown to the user.
+    """
+    start_time = time.perf_counter()
+    try:
+        counts = run_rules([rule], progress=True, plan=plan)
+    except Exception as e:
+        print(f"An error occurred: {e}")
+    else:
+        print_summary(counts, time.perf_counter() - start_time)
+
+def load_rules(rules_file):
+    """
+    Loads rules from a JSON file.
+
+    The file holds a list of objects with "action", "types" (a list of extensions or
+    glob patterns, or a single comma-separated string), "source" and, for copy and
+    move, "destination".
+
+    Args:
+    rules_file (str): The path to the JSON file.
+
+    Returns:
+    list: The Rule tuples.
+    """
+    with open(rules_file, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    rules = []
+    for entry in entries:
+        types = entry['types']
+        if isinstance(types, str):
+            types = [t.strip() for t in types.split(',')]
+        rules.append(Rule(entry['action'].lower(), types, entry['source'], entry.get('destination')))
+    return rules
 
 # Delete Function
 def delete(file_type, start_dir):
@@ -50,71 +937,19 @@ def delete(file_type, start_dir):
     # Confirmation of Delete action on the folder/sub-folders for the file type
     print(f"\nAre you sure that you want to Delete all files with the file type: {file_type.upper()}")
     print(f"from: {start_dir} and all sub-folders")
-    confirm_action = input("Y or N? ")
-    print()
-    # Guarantees that it is either N or Y so it can proceed
-    while confirm_action != "Y" and confirm_action != "N":
-        confirm_action = input("Y or N? ")
-        print()
-    if confirm_action == 'Y':
+    rule = Rule('delete', [file_type], start_dir, None)
+    plan = plan_rules([rule])
+    print_plan(plan)
+    if confirm():
         # Message saying it will start
         print(f"Files with file type {file_type.upper()} will now be Deleted from: ")
         print(f"{start_dir}")
-        # Moves directory to the start_dir
-        os.chdir(start_dir)
-        # This does an os.walk() which will step through every file in the folder
-        # and have lists of all of the folders, sub-folders and file names
-        # topdown = False means that it starts from the base folder and spiders out
-        try:
-            for folderName, subfolders, filenames in os.walk(start_dir, topdown=False):
-                # made it so there is an order to operations using a for loop
-                for i in range(2):
-                    # first operation will delete the files
-                    if i == 0:
-                        for filename in filenames:
-                            try:
-                                file_path = os.path.join(folderName, filename)
-                                # this deletes all files in all of the folders within the start_dir
-                                if file_type == "*":
-                                    os.remove(file_path)
-                                # this deletes all files with .file_type at the end within the start_dir
-                                elif filename.endswith(f'.{file_type}'):
-                                    os.remove(file_path)
-                            except FileNotFoundError:
-                                print(f"File not found: {file_path}")
-                            except PermissionError:
-                                print(f"Permission denied: {file_path}")
-                    # second operation will delete folders that are empty
-                    # inside of the start_dir folder.
-                    elif i == 1:
-                        for filename in filenames:
-                            try:
-                                if folderName != start_dir:
-                                    # deletes empty folders that are not the start_dir
-                                    try: os.rmdir(folderName)
-                                    # if there are files missing in the list or folders missing
-                                    # these exceptions just let the problem keep going
-                                    except FileNotFoundError: pass
-                                    except OSError: pass
-                            except OSError:
-                                pass  # Directory not empty
-                    else:
-                        print("\nIndex Error for File Deletion Sequence")
-                        # Pauses program and exits when Enter is pressed
-                        try: input("Press Enter to exit the program")
-                        except SyntaxError: os._exit(1)
-                        os._exit(1)
-            # message after the actions are completed
-            print("\nFile and Sub-Folder Deletion Completed")
-            
-        except Exception as e:
-            print(f"An error occurred: {e}")
-            
+        _run_interactive(rule, plan)
+        # message after the actions are completed
         print("\nFile and Sub-Folder Deletion Completed")
     # If confirmation is marked as N, displays canceled and closes
-    elif confirm_action == 'N':
+    else:
         print("\nFile and Sub-Folder Deletion Canceled")
-        pass
     # Pauses program and exits when Enter is pressed
     try: input("\nPress Enter to exit the program")
     except SyntaxError: os._exit(1)
@@ -134,65 +969,18 @@ def copy(file_type, start_dir, end_dir):
     print(f"\nAre you sure that you want to Copy all files with the file type: {file_type.upper()}")
     print(f"from: {start_dir} and all sub-folders")
     print(f"to: {end_dir}")
-    confirm_action = input("Y or N? ")
-    print()
-    # Guarantees that it is either N or Y so it can proceed
-    while confirm_action != "Y" and confirm_action != "N":
-        confirm_action = input("Y or N? ")
-        print()
-    if confirm_action == 'Y':
-        try:
-            # Message saying it will start
-            print(f"Files with file type {file_type.upper()} will now be Copied from:")
-            print(f"{start_dir} to {end_dir}")
-            # Moves directory to the start_dir
-            os.chdir(start_dir)
-            # This does an os.walk() which will step through every file in the folder
-            # and have lists of all of the folders, sub-folders and file names
-            # topdown = False means that it starts from the base folder and spiders out
-            for folderName, subfolders, filenames in os.walk(start_dir, topdown=False):
-                # this one does not need a for loop to do things in order.
-                # it only copies files/folders, doesn't need to remove folder after
-                for filename in filenames:
-                    try:
-                        src_path = src_path
-                        # searches for sub-folders using the start_dir and other folders
-                        # every loop of filename
-                        regex = re.compile(re.escape(start_dir) + r"(\\.*)")
-                        # finds the current subfolder from the start_dir if there is one
-                        # and adds it to the end_dir to match sub-folders
-                        subfolderName = re.findall(regex, folderName)
-                        try: current_end_dir = str(end_dir + subfolderName[0])
-                        # if there is no index, that means there is no sub-folder
-                        # so you want the current_end_dir to be the end_dir
-                        except IndexError: current_end_dir = str(end_dir)
-                        # makes sub-folders and copies all files
-                        if file_type == "*":
-                            # makes the folders
-                            try: os.makedirs(current_end_dir)
-                            # if the folder exists, just move on
-                            except FileExistsError: pass
-                            # copies all files
-                            shutil.copy(src_path, os.path.join(current_end_dir, filename))
-                        # copies all files with the .file_type at the end
-                        elif filename.endswith(f'.{file_type}'):
-                            # makes the folders
-                            try: os.makedirs(current_end_dir)
-                            # if the folder exists, just move on
-                            except FileExistsError: pass
-                            # copies all files of the certain file type
-                            shutil.copy(src_path, os.path.join(current_end_dir, filename))
-                    except FileNotFoundError:
-                        print(f"File not found: {src_path}")
-                    except PermissionError:
-                        print(f"Permission denied: {src_path}")
-        except Exception as e:
-            print(f"An error occurred: {e}")
+    rule = Rule('copy', [file_type], start_dir, end_dir)
+    plan = plan_rules([rule])
+    print_plan(plan)
+    if confirm():
+        # Message saying it will start
+        print(f"Files with file type {file_type.upper()} will now be Copied from:")
+        print(f"{start_dir} to {end_dir}")
+        _run_interactive(rule, plan)
         print("\nFile and Sub-Folder Copying Completed")
     # If confirmation is marked as N, displays canceled and closes
-    elif confirm_action == 'N':
+    else:
         print("\nFile and Sub-Folder Copying Canceled")
-        pass
     # Pauses program and exits when Enter is pressed
     try: input("\nPress Enter to exit the program")
     except SyntaxError: os._exit(1)
@@ -212,92 +1000,62 @@ def move(file_type, start_dir, end_dir):
     print(f"\nAre you sure that you want to Move all files with the file type: {file_type.upper()}")
     print(f"from: {start_dir} and all sub-folders")
     print(f"to: {end_dir}")
-    confirm_action = input("Y or N? ")
-    print()
-    # Guarantees that it is either N or Y so it can proceed
-    while confirm_action != "Y" and confirm_action != "N":
-        confirm_action = input("Y or N? ")
-        print()
-    if confirm_action == 'Y':
-        try:
-            # Message saying it will start
-            print(f"Files with file type {file_type.upper()} will now be Moved from:")
-            print(f" {start_dir} to {end_dir}")
-            # Moves directory to the start_dir
-            os.chdir(start_dir)
-            # This does an os.walk() which will step through every file in the folder
-            # and have lists of all of the folders, sub-folders and file names
-            # topdown = False means that it starts from the base folder and spiders out
-            for folderName, subfolders, filenames in os.walk(start_dir, topdown=False):
-                # made it so there is an order to operations using a for loop
-                for i in range(2):
-                    # first operation will move files and make sub-folders
-                    if i == 0:
-                        for filename in filenames:
-                            try:
-                                src_path = os.path.join(folderName, filename)
-                                # searches for sub-folders using the start_dir and other folders
-                                # every loop of filename
-                                regex = re.compile(re.escape(start_dir) + r"(\\.*)")
-                                # finds the current subfolder from the start_dir if there is one
-                                # and adds it to the end_dir to match sub-folders
-                                subfolderName = re.findall(regex, folderName)
-                                try: current_end_dir = str(end_dir + subfolderName[0])
-                                # if there is no index, that means there is no sub-folder
-                                # so you want the current_end_dir to be the end_dir
-                                except IndexError: current_end_dir = str(end_dir)
-                                # makes sub-folders and moves all files
-                                if file_type == "*":
-                                    # makes the folders
-                                    try: os.makedirs(current_end_dir)
-                                    # if the folder exists, just move on
-                                    except FileExistsError: pass
-                                    # moves all files
-                                    shutil.move(os.path.join(folderName, filename), os.path.join(current_end_dir, filename))
-                                # moves all files with the .file_type at the end
-                                elif filename.endswith(f'.{file_type}'):
-                                    # makes the folders
-                                    try: os.makedirs(current_end_dir)
-                                    # if the folder exists, just move on
-                                    except FileExistsError: pass
-                                    # moves all files with .file_type at the end
-                                    shutil.move(os.path.join(folderName, filename), os.path.join(current_end_dir, filename))
-                            except FileNotFoundError:
-                                print(f"File not found: {src_path}")
-                            except PermissionError:
-                                print(f"Permission denied: {src_path}")
-                    # second operation will delete folders that are empty
-                    # inside of the start_dir folder.
-                    elif i == 1:
-                        try:
-                            for filename in filenames:
-                                if folderName != start_dir:
-                                    # deletes empty folders that are not the start_dir
-                                    try: os.rmdir(folderName)
-                                    # if there are files missing in the list or folders missing
-                                    # these exceptions just let the problem keep going
-                                    except FileNotFoundError: pass
-                                    except OSError: pass
-                        except OSError:
-                            pass  # Directory not empty
-                    else:
-                        print("\nIndex Error for File Moving Sequence")
-                        # Pauses program and exits when Enter is pressed
-                        try: input("Press Enter to exit the program")
-                        except SyntaxError: os._exit(1)
-                        os._exit(1)
-        except Exception as e:
-            print(f"An error occurred: {e}")
+    rule = Rule('move', [file_type], start_dir, end_dir)
+    plan = plan_rules([rule])
+    print_plan(plan)
+    if confirm():
+        # Message saying it will start
+        print(f"Files with file type {file_type.upper()} will now be Moved from:")
+        print(f" {start_dir} to {end_dir}")
+        _run_interactive(rule, plan)
         print("\nFile and Sub-Folder Moving Completed")
     # If confirmation is marked as N, displays canceled and closes
-    elif confirm_action == 'N':
+    else:
         print("\nFile and Sub-Folder Moving Canceled")
-        pass
     # Pauses program and exits when Enter is pressed
     try: input("\nPress Enter to exit the program")
     except SyntaxError: os._exit(1)
     os._exit(1)
 
+def run_from_arguments():
+    """
+    Runs rules given on the command line, without any prompts unless confirmation is wanted.
+    """
+    parser = argparse.ArgumentParser(description="Copy, move or delete files by extension or glob pattern.")
+    parser.add_argument('--rules', help="JSON file with a list of rules to run")
+    parser.add_argument('--action', choices=RULE_ACTIONS, help="action of a single rule")
+    parser.add_argument('--types', help="comma-separated extensions or glob patterns of a single rule (\"*\" for all files)")
+    parser.add_argument('--source', help="source directory of a single rule")
+    parser.add_argument('--destination', help="destination directory of a single copy or move rule")
+    parser.add_argument('--yes', action='store_true', help="run without asking for confirmation")
+    parser.add_argument('--workers', type=int, default=COPY_WORKERS, help=f"files to handle at once (default: {COPY_WORKERS})")
+    parser.add_argument('--reflink', action='store_true', help="clone files instead of copying where the file system supports it")
+    parser.add_argument('--verify-hash', action='store_true', help="compare hashes before unlinking files moved across devices")
+    parser.add_argument('--sync', action='store_true', help="copy only files that are new or changed (by size and modification time)")
+    parser.add_argument('--sync-hash', action='store_true', help="when syncing, also compare hashes of files with the same size and time")
+    parser.add_argument('--dry-run', action='store_true', help="only list the files and bytes each action and extension would touch")
+    parser.add_argument('--progress', action='store_true', help="show files, bytes, rate and time left while running")
+    parser.add_argument('--sync-delete', action='store_true', help="when syncing, delete destination files that no longer exist in the source")
+    args = parser.parse_args()
+
+    rules = load_rules(args.rules) if args.rules else []
+    if args.action:
+        if not args.types or not args.source:
+            parser.error("--action needs --types and --source")
+        rules.append(Rule(args.action, [t.strip() for t in args.types.split(',')], args.source, args.destination))
+    if not rules:
+        parser.error("give --rules or --action")
+    start_time = time.perf_counter()
+    try:
+        counts = run_rules(rules, confirm_first=not args.yes, workers=args.workers, reflink=args.reflink,
+                           verify_hash=args.verify_hash, sync=args.sync or args.sync_hash or args.sync_delete,
+                           sync_hash=args.sync_hash, sync_delete=args.sync_delete, dry_run=args.dry_run,
+                           progress=args.progress)
+    except ValueError as e:
+        parser.error(str(e))
+    if counts is not None and not args.dry_run:
+        print_summary(counts, time.perf_counter() - start_time)
+
 def main():
     """
     Main function to handle user input and execute file operations based on the input.
@@ -344,4 +1102,8 @@ def main():
     input("\nPress Enter to exit the program")
 
 if __name__ == "__main__":
-    main()
+    # Arguments run rules without prompts, otherwise ask interactively
+    if len(sys.argv) > 1:
+        run_from_arguments()
+    else:
+        main()
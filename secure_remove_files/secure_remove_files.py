@@ -3,21 +3,33 @@
 This Python script provides a comprehensive solution for securely deleting files and directories from a specified path. It includes several functions, each serving a unique role in the secure deletion process. Here's a summary of its functions and usage:
 1. Random String Generation (get_random_string):
  1.1. Generates a random string of a specified length using ASCII letters and digits.
-2. Filling Files with Random Data (fill_file_with_random_data):
- 2.1. Writes random data to a specified file, overwriting its content. The size of the random data and the option to print status messages are configurable.
+2. Filling Files with Random Data (overwrite_file and fill_file_with_random_data):
+ 2.1. Writes random data to a specified file, overwriting its content in place. The size of the random data and the option to print status messages are configurable.
+ 2.2. The file is written in fixed-size chunks (CHUNK_SIZE) from one reused buffer with positioned writes, so memory use stays the same whatever the file size, and the number of bytes written is returned.
+ 2.3. Sparse files are overwritten only where they hold data (data_ranges, using SEEK_DATA and SEEK_HOLE where available), so their holes are not filled in on the disk. The logical size of the files and the bytes actually written are printed at the end.
 3. Emptying Files (empty_file):
- 3.1. Empties the content of a specified file by overwriting it with no data.
+ 3.1. Empties the content of a specified file by truncating it to zero bytes.
 4. Secure File Deletion (secure_delete):
  4.1. Securely deletes a file by overwriting it multiple times with random data before finally deleting it. The number of overwrite iterations and the option to print status messages are configurable.
+ 4.2. Instead of the iterations, a pass schedule (parse_schedule) can list the passes to run: 'zeros', 'ones', fixed byte patterns in hex such as '0x55', 'random', and 'verify', which reads the file back and checks it holds the data of the pass before. Constant patterns are written from one preallocated buffer. Random passes read the system's random device straight into the reused buffer, except those followed by a verify pass, which use a keyed SHAKE-128 stream that can be generated again for the check. The throughput of each pass, and the share of it spent generating data, is printed at the end to show whether the run is held up by the CPU or the disk.
 5. Secure Rename and Delete (secure_rename_delete):
  5.1. Securely renames and deletes all files and directories in a specified path. It renames each item with a random string, overwrites files with random data (as per the specified iterations), and finally deletes them. The root directory can also be renamed and deleted based on the deletetop flag.
+ 5.2. The tree is listed once with os.scandir (plan_deletion) into a bottom-up plan of file overwrites, renames and folder removals, which is then run in order (run_plan). Symlinks are renamed to a random name and deleted without following them.
+ 5.3. With dry_run set, the plan and the total bytes to be overwritten are printed (print_plan) and nothing is changed.
+ 5.4. With workers above 1, files are overwritten and deleted on a thread pool, with at most per_device files at once on each device (grouped by st_dev) so spinning disks are not thrashed. A summary of files/s and MB/s is printed at the end.
+ 5.5. The durability mode sets when data is forced to disk: 'pass' fsyncs after every overwrite pass and truncation (the safest and slowest), 'file' fsyncs once per file after its last pass, and 'batch' syncs all disks once every batch_size files and before each folder is removed, holding back the truncation and removal of the files until their data is synced. The number of syncs and the time spent in them is printed at the end.
+ 5.6. With journal_file set, the plan (including every random name) and each completed rename, overwrite pass and removal are appended to a journal. If the run dies, running it again with the same journal resumes where it stopped, without walking the tree again or overwriting finished files again. Journal records are fsynced in batches, and the journal is removed once the run finishes.
 
 How to Use This Script:
 1. Set the path in secure_rename_delete to the directory you want to securely delete.
-2. Configure secure_remove_iterations to specify how many times you want to overwrite files with random data before deletion.
+2. Configure secure_remove_iterations to specify how many times you want to overwrite files with random data before deletion, or set schedule to a list of passes such as 'zeros,ones,random,verify'.
 3. Set printremovals to 1 if you want to print status messages during the deletion process, or 0 to suppress them.
 4. Decide whether to delete the root directory (deletetop) by setting it to 1 (delete) or 0 (keep).
-5. Run the script. It will securely rename and delete files and directories in the specified path according to your configurations.
+5. Set dry_run to 1 to print the plan first without deleting anything.
+6. Set workers (and per_device) to shred several files at once, which helps most on SSDs and NVMe drives.
+7. Set durability to 'file' or 'batch' to trade some guarantees for speed on trees of many small files.
+8. Set journal_file to a path outside the folder being deleted for long jobs, so they can be resumed after a crash.
+9. Run the script. It will securely rename and delete files and directories in the specified path according to your configurations.
 
 Important Considerations:
 1. Use this script cautiously, as it will irreversibly delete files and directories.
@@ -26,12 +38,15 @@ Important Considerations:
 4. The script does not employ cryptographic wiping methods, so it may not meet certain regulatory standards for data sanitization.
 '''
 
+import errno
+import hashlib
+import json
 import os
-import shutil
 import random
-import secrets
 import string
-from pathlib import Path
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import subprocess
 import time
 
@@ -39,6 +54,259 @@ import time
 # Define the PowerShell command
 ps_command = 'Clear-History'
 
+# Size of the chunks files are overwritten in. The same buffer is reused for every
+# chunk, so a 20 GB file needs no more memory than a 1 MB one.
+CHUNK_SIZE = 1024 * 1024
+
+# Open handle on the system's random device, used to fill the buffer in place
+_urandom = None
+
+# One step of a deletion plan: action is 'file', 'link' or 'dir', new_path is the
+# random name the item is renamed to first, size is the file size in bytes and
+# device the st_dev of the file, used to limit how many files per disk are shredded at once
+PlanStep = namedtuple('PlanStep', ['action', 'path', 'new_path', 'size', 'device'])
+
+# Default number of files shredded at once on a single device when running in parallel
+PER_DEVICE_WORKERS = 4
+
+# When file data is forced to disk: 'pass' fsyncs after every overwrite pass, 'file'
+# once per file after its last pass, and 'batch' syncs all disks every BATCH_SYNC_FILES
+# files and before each folder is removed
+DURABILITY_MODES = ('pass', 'file', 'batch')
+BATCH_SYNC_FILES = 64
+
+# Number of journal records written between fsyncs of the journal
+JOURNAL_BATCH_RECORDS = 256
+
+# Named overwrite passes for pass schedules. Besides these, a pass can be a fixed
+# byte pattern in hex such as '0x55' or '924924'.
+PASS_PATTERNS = {'zeros': b'\x00', 'ones': b'\xff'}
+
+# Preallocated chunk-sized buffers of each constant pattern, shared by every file
+_pattern_buffers = {}
+
+
+class SyncStats:
+    """
+    Make fsync and sync calls, counting them and the time spent in them.
+    
+    Also holds the files written since the last batch sync, whose truncation and
+    removal wait for that sync, and the bytes and time of each overwrite pass.
+    Safe to share between threads.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.seconds = 0.0
+        self.pending = []
+        # Pass number -> [name, bytes, seconds, seconds spent generating data]
+        self.passes = {}
+        # Logical size and allocated data of the files overwritten
+        self.logical = 0
+        self.allocated = 0
+
+    def add_file(self, logical, allocated):
+        """
+        Count the size of a file about to be overwritten.
+        
+        :param logical: The size of the file
+        :param allocated: The bytes in its data ranges, which are all that gets written
+        """
+        with self.lock:
+            self.logical += logical
+            self.allocated += allocated
+
+    def add_pass(self, number, name, size, seconds, fill_seconds):
+        """
+        Count one file's overwrite or verify pass.
+        
+        :param number: The number of the pass in the schedule, from 1
+        :param name: The name of the pass, such as 'random' or '0x55'
+        :param size: The number of bytes written or read
+        :param seconds: The time the pass took
+        :param fill_seconds: The part of that time spent generating data
+        """
+        with self.lock:
+            totals = self.passes.setdefault(number, [name, 0, 0.0, 0.0])
+            totals[1] += size
+            totals[2] += seconds
+            totals[3] += fill_seconds
+
+    def print_passes(self):
+        """
+        Print the throughput of each pass, to show whether it was held up by the CPU or the disk.
+        """
+        for number, (name, size, seconds, fill_seconds) in sorted(self.passes.items()):
+            if seconds > 0:
+                print(f"Pass {number} ({name}): {size / seconds / (1024 * 1024):.1f} MB/s, "
+                      f"{fill_seconds / seconds:.0%} of the time generating data")
+
+    def _record(self, start_time):
+        with self.lock:
+            self.count += 1
+            self.seconds += time.perf_counter() - start_time
+
+    def fsync(self, fd):
+        """
+        Force one file's data to disk.
+        
+        :param fd: The file descriptor to fsync
+        """
+        start_time = time.perf_counter()
+        os.fsync(fd)
+        self._record(start_time)
+
+    def sync_all(self):
+        """
+        Force all written data on every disk to disk.
+        """
+        start_time = time.perf_counter()
+        os.sync()
+        self._record(start_time)
+
+    def file_written(self, batch_size, finish):
+        """
+        Add a file written in batch mode, syncing once batch_size files are pending.
+        
+        :param batch_size: The number of files to write between syncs
+        :param finish: A function that truncates and removes the file, run after the sync
+        """
+        with self.lock:
+            self.pending.append(finish)
+            if len(self.pending) < batch_size:
+                return
+        self.flush()
+
+    def flush(self):
+        """
+        Sync and finish the files written since the last batch sync, if any.
+        """
+        with self.lock:
+            pending, self.pending = self.pending, []
+        if pending:
+            self.sync_all()
+            for finish in pending:
+                finish()
+
+
+class Journal:
+    """
+    Append-only journal of a deletion plan and of the steps done so far, so a run that
+    dies halfway can be resumed without walking the tree again or overwriting
+    finished files again.
+    
+    The first line holds the plan, with the random name of every item, and is
+    fsynced as soon as it is written. Each later line records one step event: the
+    rename, a completed overwrite pass or the final removal. These are fsynced in
+    batches of batch_size records, so the journal does not become an fsync
+    bottleneck of its own (each record is still handed to the OS straight away). Records lost in a crash only mean some work is redone,
+    since on resume the file system itself shows whether a step's item still has
+    its old name, has its new one, or is gone. Safe to share between threads.
+    """
+
+    def __init__(self, journal_file, batch_size=JOURNAL_BATCH_RECORDS):
+        """
+        Open a journal, loading the plan and progress of an earlier run if there is one.
+        
+        :param journal_file: The path of the journal file
+        :param batch_size: The number of records to write between fsyncs
+        """
+        self.journal_file = journal_file
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.header = None
+        self.plan = None
+        self.done = set()
+        self.passes = {}
+        self.unsynced = 0
+        if os.path.exists(journal_file):
+            self._load()
+        self.file = open(journal_file, 'a', encoding='utf-8')
+
+    def _load(self):
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last line may have been cut short by the crash
+                    break
+                if record['op'] == 'plan':
+                    self.plan = [PlanStep(*step) for step in record.pop('steps')]
+                    self.header = record
+                elif record['op'] == 'pass':
+                    self.passes[record['step']] = record['pass']
+                elif record['op'] == 'done':
+                    self.done.add(record['step'])
+
+    def start(self, header, plan):
+        """
+        Write the plan of a new run and force it to disk.
+        
+        :param header: The settings of the run (path, deletetop)
+        :param plan: The plan from plan_deletion
+        """
+        with self.lock:
+            self.header = dict(header, op='plan')
+            self.plan = plan
+            self.file.write(json.dumps(dict(self.header, steps=[list(step) for step in plan])) + '\n')
+            self._sync()
+
+    def record(self, op, step, number=None):
+        """
+        Append a step event, fsyncing once batch_size records are unsynced.
+        
+        :param op: 'rename', 'pass' or 'done'
+        :param step: The index of the step in the plan
+        :param number: The pass number for 'pass' records
+        """
+        record = {'op': op, 'step': step}
+        if number is not None:
+            record['pass'] = number
+        with self.lock:
+            if op == 'done':
+                self.done.add(step)
+            self.file.write(json.dumps(record) + '\n')
+            # Hand every record to the OS, so only a power loss can cost the unsynced batch
+            self.file.flush()
+            self.unsynced += 1
+            if self.unsynced >= self.batch_size:
+                self._sync()
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+
+    def close(self):
+        """
+        Close the journal, removing it if every step of the plan is done (or there is no plan).
+        
+        :return: True if the journal was removed
+        """
+        with self.lock:
+            self._sync()
+            self.file.close()
+        # A journal without a plan never got as far as planning, so it holds nothing to resume
+        if self.plan is None or len(self.done) >= len(self.plan):
+            os.remove(self.journal_file)
+            return True
+        return False
+
+
+def _fsync(fd, stats):
+    """
+    Fsync a file, counting it in stats when given.
+    
+    :param fd: The file descriptor to fsync
+    :param stats: A SyncStats to count the call in, or None
+    """
+    if stats is not None:
+        stats.fsync(fd)
+    else:
+        os.fsync(fd)
+
 
 def get_random_string(length):
     """
@@ -53,39 +321,360 @@ def get_random_string(length):
     return result_str
 
 
-def fill_file_with_random_data(file_path, size, printremovals):
+def _fill_random(buffer):
+    """
+    Fill a buffer with cryptographically secure random data in place.
+    
+    :param buffer: A writable buffer (bytearray or memoryview) to fill
+    """
+    global _urandom
+    if _urandom is None:
+        try:
+            # Read straight into the buffer where the system has a random device
+            _urandom = open('/dev/urandom', 'rb', buffering=0)
+        except OSError:
+            _urandom = False
+    if _urandom:
+        view = memoryview(buffer)
+        filled = 0
+        while filled < len(view):
+            filled += _urandom.readinto(view[filled:])
+    else:
+        # Windows has no random device to read from
+        buffer[:] = os.urandom(len(buffer))
+
+
+def _write_at(fd, data, offset):
+    """
+    Write all of data to a file descriptor at the given offset.
+    
+    :param fd: The file descriptor to write to
+    :param data: The data to write
+    :param offset: The position in the file to write at
+    :return: The number of bytes written
+    """
+    view = memoryview(data)
+    written = 0
+    while written < len(view):
+        if hasattr(os, 'pwrite'):
+            written += os.pwrite(fd, view[written:], offset + written)
+        else:
+            # Windows has no pwrite, so seek and write instead
+            os.lseek(fd, offset + written, os.SEEK_SET)
+            written += os.write(fd, view[written:])
+    return written
+
+
+def data_ranges(file_path, size):
+    """
+    Find the ranges of a file that hold data, skipping the holes of sparse files.
+    
+    Uses SEEK_DATA and SEEK_HOLE where the system has them. Elsewhere, or where the
+    file system cannot report holes, the whole file counts as one range.
+    
+    :param file_path: The path of the file
+    :param size: The size of the file
+    :return: A list of (start, end) byte ranges
+    """
+    if size == 0:
+        return []
+    if not hasattr(os, 'SEEK_DATA'):
+        return [(0, size)]
+    ranges = []
+    offset = 0
+    fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        while offset < size:
+            try:
+                start = os.lseek(fd, offset, os.SEEK_DATA)
+            except OSError as e:
+                if e.errno == errno.ENXIO:
+                    # Nothing but holes from here to the end of the file
+                    break
+                raise
+            if start >= size:
+                break
+            end = min(os.lseek(fd, start, os.SEEK_HOLE), size)
+            ranges.append((start, end))
+            offset = end
+    except OSError:
+        # The file system cannot report holes, so overwrite the whole file
+        return [(0, size)]
+    finally:
+        os.close(fd)
+    return ranges
+
+
+def _chunks(ranges, chunk_size):
+    """
+    Split byte ranges into chunks of at most chunk_size bytes.
+    
+    :param ranges: A list of (start, end) byte ranges
+    :param chunk_size: The largest chunk
+    :return: A generator of (offset, length) tuples
+    """
+    for start, end in ranges:
+        for offset in range(start, end, chunk_size):
+            yield offset, min(chunk_size, end - offset)
+
+
+def overwrite_file(file_path, size, fill, chunk_size=CHUNK_SIZE, fsync=True, stats=None, ranges=None):
+    """
+    Overwrite the first size bytes of a file in place, one chunk at a time.
+    
+    The file is opened without truncation and written with positioned writes from a
+    single reused buffer, so memory use does not depend on the file size. Given the
+    data ranges of a sparse file, only those are written, so its holes are not
+    filled in on the disk.
+    
+    :param file_path: The path of the file to overwrite
+    :param size: The number of bytes to overwrite
+    :param fill: A function that fills the buffer it is given with the data to write,
+                 or a preallocated buffer of constant data that is written as it is
+                 (its length is then the chunk size)
+    :param chunk_size: The size of each write
+    :param fsync: If true, fsync the file once it is written
+    :param stats: A SyncStats to count the fsync in, or None
+    :param ranges: The (start, end) byte ranges to write, from data_ranges, or None
+                   for the whole size
+    :return: The number of bytes written
+    """
+    if ranges is None:
+        ranges = [(0, size)] if size else []
+    if callable(fill):
+        view = memoryview(bytearray(min(chunk_size, size)))
+    else:
+        view = memoryview(fill)
+        chunk_size = len(view)
+        fill = None
+    written = 0
+    fd = os.open(file_path, os.O_WRONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        for offset, length in _chunks(ranges, chunk_size):
+            chunk = view[:length]
+            if fill is not None:
+                fill(chunk)
+            written += _write_at(fd, chunk, offset)
+        if fsync:
+            _fsync(fd, stats)
+    finally:
+        os.close(fd)
+    return written
+
+
+def fill_file_with_random_data(file_path, size, printremovals, fsync=True, stats=None):
     """
     Fill a file with random data.
     
     :param file_path: The path of the file to fill with random data
     :param size: The size of the random data to fill the file with
     :param printremovals: If true, print messages about the data removal process
+    :param fsync: If true, fsync the file once it is written
+    :param stats: A SyncStats to count the fsync in, or None
+    :return: The number of bytes written
     """
     try:
-        # Generate cryptographically secure random data
-        random_data = secrets.token_bytes(size)
-        # Write the random data to the file
-        with open(file_path, 'wb') as f:
-            f.write(random_data)
-            f.flush()
-            os.fsync(f.fileno())
+        # Overwrite the file in place with cryptographically secure random data
+        written = overwrite_file(file_path, size, _fill_random, fsync=fsync, stats=stats)
         # Print a message if printremovals is true
         if printremovals and size != 0:
-            print(f"Filled {file_path} with random data")
+            print(f"Filled {file_path} with {written} bytes of random data")
+        return written
     except Exception as e:
         print(f"An error occurred while filling the file {file_path} with random data: {str(e)}")
+        return 0
+
+
+def parse_schedule(schedule):
+    """
+    Parse a pass schedule.
+    
+    :param schedule: A list of pass names, or a string of them separated by commas.
+                     Each is 'zeros', 'ones', 'random', 'verify' (read back the pass
+                     before it) or a fixed byte pattern in hex such as '0x55'.
+    :return: A list of (name, pattern) tuples, where pattern is the bytes of a
+             constant pass and None for 'random' and 'verify'
+    """
+    if isinstance(schedule, str):
+        schedule = schedule.split(',')
+    passes = []
+    for name in schedule:
+        name = name.strip().lower()
+        if name in PASS_PATTERNS:
+            passes.append((name, PASS_PATTERNS[name]))
+        elif name in ('random', 'verify'):
+            if name == 'verify' and (not passes or passes[-1][0] == 'verify'):
+                raise ValueError("A verify pass must follow an overwrite pass")
+            passes.append((name, None))
+        else:
+            try:
+                pattern = bytes.fromhex(name[2:] if name.startswith('0x') else name)
+            except ValueError:
+                pattern = b''
+            if not pattern:
+                raise ValueError(f"Unknown pass {name}, expected zeros, ones, random, verify or a hex byte pattern")
+            passes.append((name, pattern))
+    return passes
 
 
-def empty_file(file_path, printremovals):
+def _pattern_buffer(pattern, chunk_size=CHUNK_SIZE):
+    """
+    Get the preallocated buffer of a constant pattern, about chunk_size long.
+    
+    The length is a whole number of repeats, so consecutive chunks carry the pattern on
+    without a seam.
+    
+    :param pattern: The bytes to repeat
+    :param chunk_size: The most bytes the buffer may hold
+    :return: The buffer
+    """
+    buffer = _pattern_buffers.get(pattern)
+    if buffer is None:
+        buffer = pattern * max(1, chunk_size // len(pattern))
+        _pattern_buffers[pattern] = buffer
+    return buffer
+
+
+def _keyed_random_fill(key, timer):
+    """
+    Make a fill function for a random pass that can be generated again to verify it.
+    
+    The data is a SHAKE-128 stream keyed with a fresh random key, one digest per
+    chunk with the chunk number as a counter.
+    
+    :param key: The secret random key of the pass
+    :param timer: A one-item list the time spent generating data is added to
+    :return: The fill function
+    """
+    counter = [0]
+
+    def fill(buffer):
+        start_time = time.perf_counter()
+        buffer[:] = hashlib.shake_128(key + counter[0].to_bytes(8, 'little')).digest(len(buffer))
+        counter[0] += 1
+        timer[0] += time.perf_counter() - start_time
+    return fill
+
+
+def _timed_random_fill(timer):
+    """
+    Make a fill function for a random pass from the system's random device.
+    
+    :param timer: A one-item list the time spent generating data is added to
+    :return: The fill function
+    """
+    def fill(buffer):
+        start_time = time.perf_counter()
+        _fill_random(buffer)
+        timer[0] += time.perf_counter() - start_time
+    return fill
+
+
+def verify_file(file_path, size, expected, chunk_size=CHUNK_SIZE, ranges=None):
+    """
+    Read a file back and check it holds the data of the pass before.
+    
+    The file's cached pages are dropped first where the system allows it, so the
+    data is read from the disk rather than from memory.
+    
+    :param file_path: The path of the file to check
+    :param size: The number of bytes to check
+    :param expected: A fill function that regenerates the pass data, or the
+                     preallocated buffer of a constant pattern
+    :param chunk_size: The size of each read
+    :param ranges: The (start, end) byte ranges the pass wrote, or None for the whole size
+    :return: The number of bytes checked
+    :raises OSError: If the data read back differs
+    """
+    if ranges is None:
+        ranges = [(0, size)] if size else []
+    if callable(expected):
+        view = memoryview(bytearray(min(chunk_size, size)))
+    else:
+        view = memoryview(expected)
+        chunk_size = len(view)
+        expected = None
+    checked = 0
+    fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        for offset, length in _chunks(ranges, chunk_size):
+            chunk = view[:length]
+            if expected is not None:
+                expected(chunk)
+            if hasattr(os, 'pread'):
+                data = os.pread(fd, length, offset)
+            else:
+                # Windows has no pread, so seek and read instead
+                os.lseek(fd, offset, os.SEEK_SET)
+                data = os.read(fd, length)
+            if data != chunk:
+                raise OSError(f"Verification of {file_path} failed at offset {offset}")
+            checked += len(data)
+    finally:
+        os.close(fd)
+    return checked
+
+
+def run_pass(file_path, size, number, schedule, keys, fsync, stats=None, ranges=None):
+    """
+    Run one pass of a schedule on a file.
+    
+    :param file_path: The path of the file
+    :param size: The size of the file
+    :param number: The index of the pass in the schedule
+    :param schedule: The schedule from parse_schedule
+    :param keys: A dict of the keys of random passes by index, for verify passes
+    :param fsync: If true, fsync the file once it is written
+    :param stats: A SyncStats to count the fsync and the pass throughput in, or None
+    :param ranges: The (start, end) data ranges of the file, or None for the whole size
+    :return: The number of bytes written (0 for a verify pass)
+    """
+    name, pattern = schedule[number]
+    timer = [0.0]
+    start_time = time.perf_counter()
+    if name == 'verify':
+        written_name, written_pattern = schedule[number - 1]
+        if written_pattern is not None:
+            expected = _pattern_buffer(written_pattern)
+        else:
+            expected = _keyed_random_fill(keys[number - 1], timer)
+        processed = verify_file(file_path, size, expected, ranges=ranges)
+        written = 0
+    else:
+        if pattern is not None:
+            fill = _pattern_buffer(pattern)
+        elif number + 1 < len(schedule) and schedule[number + 1][0] == 'verify':
+            # A keyed stream can be generated again to check the data read back
+            keys[number] = os.urandom(32)
+            fill = _keyed_random_fill(keys[number], timer)
+        else:
+            fill = _timed_random_fill(timer)
+        written = processed = overwrite_file(file_path, size, fill, fsync=fsync, stats=stats, ranges=ranges)
+    if stats is not None:
+        stats.add_pass(number + 1, name, processed, time.perf_counter() - start_time, timer[0])
+    return written
+
+
+def empty_file(file_path, printremovals, fsync=True, stats=None):
     """
     Empty a file.
     
     :param file_path: The path of the file to empty
     :param printremovals: If true, print messages about the data removal process
+    :param fsync: If true, fsync the file once it is truncated
+    :param stats: A SyncStats to count the fsync in, or None
     """
     try:
-        # Overwrite the file with no data
-        fill_file_with_random_data(file_path, 0, printremovals)
+        # Truncate the file to zero bytes, since overwriting no longer truncates
+        fd = os.open(file_path, os.O_WRONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            os.ftruncate(fd, 0)
+            if fsync:
+                _fsync(fd, stats)
+        finally:
+            os.close(fd)
         # Print a message if printremovals is true
         if printremovals:
             print(f"Emptied {file_path}")
@@ -93,83 +682,380 @@ def empty_file(file_path, printremovals):
         print(f"An error occurred while emptying the file {file_path}: {str(e)}")
 
 
-def secure_delete(file_path, secure_remove_iterations, printremovals):
+def _remove_file(file_path, printremovals, fsync=True, stats=None, progress=None):
     """
-    Securely delete a file.
+    Truncate and delete a file whose overwrite passes are done.
     
     :param file_path: The path of the file to delete
-    :param secure_remove_iterations: The number of times to overwrite the file with random data before deleting
     :param printremovals: If true, print messages about the data removal process
+    :param fsync: If true, fsync the file once it is truncated
+    :param stats: A SyncStats to count the fsync in, or None
+    :param progress: A function called with 'done' once the file is deleted, or None
     """
     try:
-        # If secure_remove_iterations is greater than 0, overwrite the file with random data the specified number of times
-        if secure_remove_iterations > 0:
-            for _ in range(secure_remove_iterations):
-                fill_file_with_random_data(file_path, os.path.getsize(file_path), printremovals)
-        # Overwrite the file with no data
-        empty_file(file_path, printremovals)
+        # Truncate the file to no data
+        empty_file(file_path, printremovals, fsync, stats)
         # Delete the file
         os.remove(file_path)
+        if progress is not None:
+            progress('done')
+        if printremovals:
+            print(f"Deleted {file_path}")
     except Exception as e:
         print(f"An error occurred while securely deleting the file {file_path}: {str(e)}")
 
 
-def secure_rename_delete(path, secure_remove_iterations, printremovals, deletetop):
+def secure_delete(file_path, secure_remove_iterations, printremovals, durability='pass', stats=None,
+                  batch_size=BATCH_SYNC_FILES, start_pass=0, progress=None, schedule=None):
     """
-    Securely rename and delete all files and folders in a path.
+    Securely delete a file.
+    
+    In 'file' and 'batch' durability modes only the last pass is sure to reach the
+    disk, since earlier passes may be overwritten in the cache before being written out.
+    A pass followed by a verify pass is always fsynced, so there is data on the disk
+    to check. In 'batch' mode the truncation and removal wait for the next sync of
+    stats, so the overwritten data is on disk before the file goes. A file that
+    fails verification is left in place.
+    
+    :param file_path: The path of the file to delete
+    :param secure_remove_iterations: The number of times to overwrite the file with random data before deleting
+    :param printremovals: If true, print messages about the data removal process
+    :param durability: One of DURABILITY_MODES
+    :param stats: A SyncStats to count fsyncs and pass throughput in, required for 'batch' mode
+    :param batch_size: The number of files to write between syncs in 'batch' mode
+    :param start_pass: The number of passes already done by an earlier run
+    :param progress: A function called with ('pass', n) once pass n is synced to disk
+                     and with 'done' once the file is deleted, or None
+    :param schedule: A pass schedule from parse_schedule, used instead of
+                     secure_remove_iterations random passes
+    :return: The total number of bytes written over all passes
+    """
+    if durability == 'batch' and stats is None:
+        durability = 'file'
+    if schedule is None:
+        schedule = [('random', None)] * secure_remove_iterations
+    if 0 < start_pass < len(schedule) and schedule[start_pass][0] == 'verify' and schedule[start_pass - 1][1] is None:
+        # The key of the random pass to verify is gone with the earlier run, so write it again
+        start_pass -= 1
+    last_write = max((i for i, (name, _) in enumerate(schedule) if name != 'verify'), default=-1)
+    keys = {}
+    written = 0
+    try:
+        # Run each pass of the schedule that an earlier run has not finished
+        if schedule:
+            size = os.path.getsize(file_path)
+            # Only the allocated ranges are overwritten, so sparse files stay sparse
+            ranges = data_ranges(file_path, size)
+            if stats is not None:
+                stats.add_file(size, sum(end - start for start, end in ranges))
+            for i in range(start_pass, len(schedule)):
+                name = schedule[i][0]
+                verify_next = i + 1 < len(schedule) and schedule[i + 1][0] == 'verify'
+                fsync = name != 'verify' and (durability == 'pass' or verify_next or
+                                              (durability == 'file' and i == last_write))
+                pass_written = run_pass(file_path, size, i, schedule, keys, fsync, stats, ranges)
+                written += pass_written
+                # Print a message if printremovals is true
+                if printremovals and size != 0:
+                    if name == 'verify':
+                        print(f"Verified {file_path}")
+                    else:
+                        print(f"Filled {file_path} with {pass_written} of its {size} bytes of {name} data")
+                if (fsync or name == 'verify') and progress is not None:
+                    progress('pass', i + 1)
+    except Exception as e:
+        print(f"An error occurred while securely deleting the file {file_path}: {str(e)}")
+        return written
+    if durability == 'batch':
+        stats.file_written(batch_size, lambda: _remove_file(file_path, printremovals, False, stats, progress))
+    else:
+        fsync = durability == 'pass' or last_write < 0
+        _remove_file(file_path, printremovals, fsync, stats, progress)
+    return written
+
+
+def plan_deletion(path, deletetop):
+    """
+    Enumerate a path once and build a bottom-up plan for deleting it.
+    
+    Every directory is listed a single time with os.scandir, and each file, symlink
+    and directory gets its random new name up front. Since a directory only comes
+    after everything inside it, running the steps in order never renames a folder
+    before its contents are gone.
     
     :param path: The path to secure delete
+    :param deletetop: If true, the plan also renames and removes the root folder
+    :return: A list of PlanStep tuples, in the order they should be run
+    """
+    # Drop any trailing separator, so the root's parent is found and not the root itself
+    path = os.path.normpath(os.fspath(path))
+    plan = []
+    # Folders still to list, with a flag set once their contents are planned
+    stack = [(path, False)]
+    while stack:
+        folder, listed = stack.pop()
+        if listed:
+            if folder != path or deletetop:
+                new_path = os.path.join(os.path.dirname(folder), get_random_string(16))
+                plan.append(PlanStep('dir', folder, new_path, 0, None))
+            continue
+        stack.append((folder, True))
+        if folder == path:
+            entries = os.scandir(folder)
+        else:
+            try:
+                entries = os.scandir(folder)
+            except OSError as e:
+                # Leave unreadable subfolders to fail at their own rmdir step
+                print(f"An error occurred while listing the folder {folder}: {str(e)}")
+                continue
+        with entries:
+            for entry in entries:
+                if entry.is_symlink():
+                    # Remove links themselves, never what they point to
+                    new_path = os.path.join(folder, get_random_string(16))
+                    plan.append(PlanStep('link', entry.path, new_path, 0, None))
+                elif entry.is_dir():
+                    stack.append((entry.path, False))
+                else:
+                    new_path = os.path.join(folder, get_random_string(16) + '.txt')
+                    stat = entry.stat()
+                    plan.append(PlanStep('file', entry.path, new_path, stat.st_size, stat.st_dev))
+    return plan
+
+
+def print_plan(plan, secure_remove_iterations, schedule=None):
+    """
+    Print a deletion plan without running it.
+    
+    :param plan: The plan from plan_deletion
+    :param secure_remove_iterations: The number of times each file would be overwritten
+    :param schedule: A pass schedule from parse_schedule, used instead of secure_remove_iterations
+    """
+    for step in plan:
+        if step.action == 'file':
+            print(f"Overwrite {step.path} ({step.size} bytes) as {step.new_path} and delete it")
+        elif step.action == 'link':
+            print(f"Rename link {step.path} to {step.new_path} and delete it")
+        else:
+            print(f"Rename {step.path} to {step.new_path} and remove it")
+    files = sum(1 for step in plan if step.action == 'file')
+    if schedule is not None:
+        secure_remove_iterations = sum(1 for name, _ in schedule if name != 'verify')
+    total_bytes = sum(step.size for step in plan) * secure_remove_iterations
+    # Holes in sparse files are skipped when the plan is run, so this is an upper bound
+    print(f"{files} files, {len(plan) - files} links and folders, up to {total_bytes} bytes to overwrite")
+
+
+def run_step(step, secure_remove_iterations, printremovals, durability='pass', stats=None, batch_size=BATCH_SYNC_FILES,
+             journal=None, index=None, schedule=None):
+    """
+    Run a single step of a deletion plan.
+    
+    With a journal, steps it already records as done are skipped, and a step whose
+    item no longer has its old name is picked up from its new name (or counted as
+    done when neither name exists).
+    
+    :param step: The PlanStep to run
     :param secure_remove_iterations: The number of times to overwrite files with random data before deleting
     :param printremovals: If true, print messages about the data removal process
-    :param deletetop: If true, rename and delete the root folder. Otherwise, leave it alone.
+    :param durability: One of DURABILITY_MODES
+    :param stats: A SyncStats to count fsyncs in, required for 'batch' mode
+    :param batch_size: The number of files to write between syncs in 'batch' mode
+    :param journal: A Journal to record progress in, or None
+    :param index: The index of the step in the plan, for the journal
+    :param schedule: A pass schedule from parse_schedule, used instead of secure_remove_iterations
+    :return: The number of bytes written
     """
+    def progress(op, number=None):
+        if journal is not None:
+            journal.record(op, index, number)
+
+    written = 0
     try:
-        # Iterate over all subfolders and files in the path
-        for foldername, subfolders, filenames in os.walk(path):
-            # Handle subfolders
-            for subfolder in subfolders:
-                old_path = Path(foldername) / subfolder
-                new_path = Path(foldername) / get_random_string(16)
-                # Rename subfolder
-                os.rename(old_path, new_path)
-                # Print a message if printremovals is true
+        if journal is not None and index in journal.done:
+            return 0
+        if step.action == 'link':
+            # Rename the link itself, so its name is gone before it is removed
+            if journal is None or os.path.lexists(step.path):
+                os.rename(step.path, step.new_path)
+                progress('rename')
                 if printremovals:
-                    print(f"Changed {old_path} to {new_path}")
-                # Recursively secure rename and delete the subfolder
-                secure_rename_delete(new_path, secure_remove_iterations, printremovals, deletetop=0)
+                    print(f"Changed {step.path} to {step.new_path}")
+            if journal is None or os.path.lexists(step.new_path):
+                os.unlink(step.new_path)
                 if printremovals:
-                    print(f"Deleted {new_path}")
-            # Handle files
-            for filename in filenames:
-                old_path = Path(foldername) / filename
-                new_path = Path(foldername) / (get_random_string(16) + '.txt')
-                # Rename file
-                os.rename(old_path, new_path)
-                # Print a message if printremovals is true
-                if printremovals:
-                    print(f"Changed {old_path} to {new_path}")
-                # Securely delete the file
-                secure_delete(new_path, secure_remove_iterations, printremovals)
-                if printremovals:
-                    print(f"Deleted {new_path}")
-                    
-        # If deletetop is true, rename and delete the root folder
-        if deletetop:
-            # Rename the root folder
-            parent_path = Path(path).parent
-            new_root_folder_name = get_random_string(16)
-            new_path = parent_path / new_root_folder_name
-            os.rename(path, new_path)
+                    print(f"Deleted link {step.new_path}")
+            progress('done')
+            return 0
+        if step.action == 'dir':
+            if journal is not None and not os.path.lexists(step.path) and not os.path.lexists(step.new_path):
+                # Neither name exists, so an earlier run finished the step without recording it
+                progress('done')
+                return 0
+            # Files still waiting for a batch sync have to go before their folder can
+            if stats is not None:
+                stats.flush()
+            # Never rename a folder that still holds items, which a resumed run would lose track of
+            with os.scandir(step.path if os.path.lexists(step.path) else step.new_path) as entries:
+                if next(entries, None) is not None:
+                    raise OSError(f"The folder {step.path} is not empty")
+        if journal is None or os.path.lexists(step.path):
+            # Rename the file or folder
+            os.rename(step.path, step.new_path)
+            progress('rename')
             # Print a message if printremovals is true
             if printremovals:
-                print(f"Changed {path} to {new_path}")
-            # Delete the root folder
-            shutil.rmtree(new_path)
-            if printremovals:
-                print(f"Deleted {new_path}")
-        
+                print(f"Changed {step.path} to {step.new_path}")
+        elif not os.path.lexists(step.new_path):
+            # Neither name exists, so an earlier run finished the step without recording it
+            progress('done')
+            return 0
+        if step.action == 'file':
+            # Securely delete the file
+            start_pass = journal.passes.get(index, 0) if journal is not None else 0
+            return secure_delete(step.new_path, secure_remove_iterations, printremovals, durability, stats, batch_size,
+                                 start_pass, progress, schedule)
+        # The folder is empty by now, so remove it
+        os.rmdir(step.new_path)
+        progress('done')
+        if printremovals:
+            print(f"Deleted {step.new_path}")
+    except Exception as e:
+        print(f"An error occurred while securely deleting {step.path}: {str(e)}")
+    return written
+
+
+def run_plan(plan, secure_remove_iterations, printremovals, workers=1, per_device=PER_DEVICE_WORKERS,
+             durability='pass', batch_size=BATCH_SYNC_FILES, journal=None, schedule=None):
+    """
+    Run a deletion plan from plan_deletion and print a summary of the throughput.
+    
+    A step that fails is reported and skipped, so one locked file does not stop the
+    rest of the tree from being removed; its folder is then left in place.
+    
+    With more than one worker, files and links are shredded on a thread pool, with at
+    most per_device files in flight on each device (st_dev) so spinning disks are not
+    thrashed, and the folders are removed in plan order once all files are gone.
+    
+    :param plan: The plan from plan_deletion
+    :param secure_remove_iterations: The number of times to overwrite files with random data before deleting
+    :param printremovals: If true, print messages about the data removal process
+    :param workers: The number of files to shred at once
+    :param per_device: The most files to shred at once on a single device
+    :param durability: One of DURABILITY_MODES
+    :param batch_size: The number of files to write between syncs in 'batch' mode
+    :param journal: A Journal to record progress in and resume from, or None
+    :param schedule: A pass schedule from parse_schedule, used instead of secure_remove_iterations
+    :return: The total number of bytes written
+    """
+    start_time = time.perf_counter()
+    stats = SyncStats()
+
+    def run(index):
+        return run_step(plan[index], secure_remove_iterations, printremovals, durability, stats, batch_size, journal, index,
+                        schedule)
+
+    written = 0
+    if workers <= 1:
+        for index in range(len(plan)):
+            written += run(index)
+    else:
+        limits = {step.device: threading.BoundedSemaphore(per_device) for step in plan if step.action == 'file'}
+
+        def shred(index):
+            if plan[index].action != 'file':
+                return run(index)
+            with limits[plan[index].device]:
+                return run(index)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            written = sum(executor.map(shred, [index for index, step in enumerate(plan) if step.action != 'dir']))
+        for index, step in enumerate(plan):
+            if step.action == 'dir':
+                run(index)
+    stats.flush()
+
+    elapsed = time.perf_counter() - start_time
+    files = sum(1 for step in plan if step.action == 'file')
+    if elapsed > 0:
+        print(f"Shredded {files} files ({written} bytes written) in {elapsed:.2f}s: "
+              f"{files / elapsed:.1f} files/s, {written / elapsed / (1024 * 1024):.1f} MB/s")
+    if stats.logical > stats.allocated:
+        print(f"Logical size {stats.logical} bytes, of which {stats.allocated} bytes are data "
+              f"and {stats.logical - stats.allocated} bytes are holes that were skipped")
+    stats.print_passes()
+    print(f"Durability '{durability}': {stats.count} syncs taking {stats.seconds:.2f}s")
+    return written
+
+
+def secure_rename_delete(path, secure_remove_iterations, printremovals, deletetop, dry_run=0, workers=1,
+                         per_device=PER_DEVICE_WORKERS, durability='pass', batch_size=BATCH_SYNC_FILES, journal_file=None,
+                         schedule=None):
+    """
+    Securely rename and delete all files and folders in a path.
+    
+    :param path: The path to secure delete
+    :param secure_remove_iterations: The number of times to overwrite files with random data before deleting
+    :param printremovals: If true, print messages about the data removal process
+    :param deletetop: If true, rename and delete the root folder. Otherwise, leave it alone.
+    :param dry_run: If true, only print the plan and the total bytes to overwrite
+    :param workers: The number of files to shred at once (1 shreds them one by one)
+    :param per_device: The most files to shred at once on a single device
+    :param durability: When data is forced to disk, one of DURABILITY_MODES
+    :param batch_size: The number of files to write between syncs in 'batch' mode
+    :param journal_file: A journal file (kept outside path) to record progress in. If it
+                         holds the plan of an interrupted run on the same path, that run
+                         is resumed. It is removed once every step is done.
+    :param schedule: The overwrite passes to run on each file instead of
+                     secure_remove_iterations random passes, as a list or comma-separated
+                     string of 'zeros', 'ones', 'random', 'verify' and hex byte patterns
+    :return: The total number of bytes written
+    """
+    if durability not in DURABILITY_MODES:
+        print(f"Unknown durability mode {durability}, expected one of {', '.join(DURABILITY_MODES)}")
+        return 0
+    if durability == 'batch' and not hasattr(os, 'sync'):
+        # Windows has no call to sync every disk at once
+        print("Batch durability is not available on this system, using 'file' instead")
+        durability = 'file'
+    try:
+        if schedule is not None:
+            schedule = parse_schedule(schedule)
+        if journal_file and not dry_run:
+            root = os.path.join(os.path.abspath(path), '')
+            if os.path.abspath(journal_file).startswith(root):
+                print(f"The journal {journal_file} must be kept outside {path}")
+                return 0
+            journal = Journal(journal_file)
+            try:
+                if journal.plan is None:
+                    plan = plan_deletion(path, deletetop)
+                    journal.start({'path': os.path.abspath(path), 'deletetop': bool(deletetop),
+                                   'schedule': [name for name, _ in schedule] if schedule is not None else None}, plan)
+                elif journal.header['path'] != os.path.abspath(path):
+                    print(f"The journal {journal_file} belongs to {journal.header['path']}, not {path}")
+                    return 0
+                else:
+                    plan = journal.plan
+                    # Pass numbers in the journal only make sense with the schedule they were written with
+                    if journal.header.get('schedule') is not None:
+                        schedule = parse_schedule(journal.header['schedule'])
+                    print(f"Resuming from {journal_file}: {len(journal.done)} of {len(plan)} steps already done")
+                return run_plan(plan, secure_remove_iterations, printremovals, workers, per_device, durability, batch_size,
+                                journal, schedule)
+            finally:
+                if not journal.close():
+                    print(f"Not every step finished; rerun with the same journal {journal_file} to resume")
+        plan = plan_deletion(path, deletetop)
+        if dry_run:
+            print_plan(plan, secure_remove_iterations, schedule)
+            return 0
+        return run_plan(plan, secure_remove_iterations, printremovals, workers, per_device, durability, batch_size,
+                        schedule=schedule)
     except Exception as e:
         print(f"An error occurred while securely renaming and deleting the path {path}: {str(e)}")
+        return 0
 
 # Securely delete a path.
-secure_rename_delete(path=r"C:\test\test", secure_remove_iterations=0, printremovals=1, deletetop=0)
+secure_rename_delete(path=r"C:\test\test", secure_remove_iterations=0, printremovals=1, deletetop=0, dry_run=0, workers=1, durability='pass', journal_file=None, schedule=None)